@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+""" Benchmarks and correctness checks for the move generator.
+
+Run `python3 bench.py perft` to count the leaf nodes of the standard perft
+positions and compare them against their known values, or
+`python3 bench.py perft --fen FEN --depth N --divide` to count the nodes
+below each move of a single position. `python3 bench.py memory` reports the
+memory used by each board and move.
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from chess import Board, Move, SQUARES
+from bitboard import BitBoard
+
+BACKENDS = {
+    'board': Board,
+    'bitboard': BitBoard,
+}
+
+# name: (fen, [perft(1), perft(2), ...])
+PERFT_POSITIONS = {
+    'start': ('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+              [20, 400, 8902, 197281, 4865609]),
+    'kiwipete': ('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+                 [48, 2039, 97862, 4085603]),
+    'position3': ('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+                  [14, 191, 2812, 43238, 674624]),
+    'position4': ('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+                  [6, 264, 9467, 422333]),
+    'position5': ('rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+                  [44, 1486, 62379, 2103487]),
+    'position6': ('r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+                  [46, 2079, 89890, 3894594]),
+}
+
+
+def run_perft(board, depth: int, use_hash: bool = False, divide: bool = False):
+    """ Count the leaf nodes below board, print them along with the time taken
+    and the nodes per second, and return the count."""
+    table = {} if use_hash else None
+    start = time.perf_counter()
+    if divide:
+        counts = board.divide(depth, table)
+        for move, count in sorted(counts.items()):
+            print('{}: {}'.format(move, count))
+        nodes = sum(counts.values())
+    else:
+        nodes = board.perft(depth, table)
+    elapsed = time.perf_counter() - start
+    nps = nodes / elapsed if elapsed > 0 else 0
+    print('depth {}: {} nodes in {:.3f}s ({:.0f} nodes/s)'.format(depth, nodes, elapsed, nps))
+    return nodes
+
+
+def perft_command(args) -> int:
+    """ Run perft on the chosen positions, return 1 if a count is wrong."""
+    backend = BACKENDS[args.backend]
+    if args.fen:
+        positions = {'fen': (args.fen, [])}
+    elif args.position:
+        positions = {args.position: PERFT_POSITIONS[args.position]}
+    else:
+        positions = PERFT_POSITIONS
+
+    failed = False
+    for name, (fen, expected) in positions.items():
+        depth = args.depth if args.depth else min(2, len(expected))
+        print('{} ({})'.format(name, fen))
+        nodes = run_perft(backend(fen), depth, args.hash, args.divide)
+        if depth <= len(expected) and nodes != expected[depth - 1]:
+            print('MISMATCH: expected {}'.format(expected[depth - 1]))
+            failed = True
+    return 1 if failed else 0
+
+
+def bytes_per_object(factory, count: int) -> float:
+    """ Return the average number of bytes allocated by a call to factory
+    and still in use, after collecting any garbage it leaves behind."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for _ in range(count)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def memory_command(args) -> int:
+    """ Print the bytes used by each board and move."""
+    fen = args.fen or Board.initial_setup
+    move_count = len(Board(fen).all_legal_moves)
+    factories = {
+        'Board': lambda: Board(fen),
+        'BitBoard': lambda: BitBoard(fen),
+        'Move': lambda: Move(SQUARES[52], SQUARES[36]),
+    }
+    for name, factory in factories.items():
+        print('{:10} {:8.0f} bytes'.format(name, bytes_per_object(factory, args.count)))
+    board = Board(fen)
+
+    def legal_moves():
+        # measure the moves, not the boards, and generate them every time
+        board.legal_move_cache.clear()
+        return board.all_legal_moves
+
+    move_list = bytes_per_object(legal_moves, args.count)
+    print('{:10} {:8.0f} bytes per move, in a list of {} legal moves'.format(
+        'move list', move_list / max(1, move_count), move_count))
+    return 0
+
+
+def main(argv=None) -> int:
+    """ Parse the command line and run the chosen benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0].strip())
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    perft = commands.add_parser('perft', help='count the leaf nodes of the move tree')
+    perft.add_argument('--depth', type=int, help='the depth to search, 2 by default')
+    position = perft.add_mutually_exclusive_group()
+    position.add_argument('--position', choices=sorted(PERFT_POSITIONS),
+                          help='run a single standard position')
+    position.add_argument('--fen', help='run the position given by a fen string')
+    perft.add_argument('--divide', action='store_true',
+                       help='print the node count below each move')
+    perft.add_argument('--hash', action='store_true',
+                       help='cache the counts of transposed subtrees')
+    perft.add_argument('--backend', choices=sorted(BACKENDS), default='board',
+                       help='the board implementation to use')
+    perft.set_defaults(run=perft_command)
+
+    memory = commands.add_parser('memory', help='report the memory used per object')
+    memory.add_argument('--fen', help='the position to build boards from')
+    memory.add_argument('--count', type=int, default=1000,
+                        help='the number of objects to average over')
+    memory.set_defaults(run=memory_command)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+""" A bitboard backed chess board.
+
+BitBoard keeps one 64 bit integer per (color, piece type) and one occupancy
+mask per color, alongside a 64 element mailbox for constant time piece lookup.
+It exposes the same interface as chess.Board that play() and the players rely
+on, so it can be passed to play() in place of a Board.
+
+Squares are numbered like the 8x8 matrix used by Board: square row * 8 + col
+is SQUARES[row * 8 + col], so bit 0 is a8 and bit 63 is h1.
+"""
+
+from collections import OrderedDict
+from typing import List
+
+from chess import (Color, Location, Move, Board, PIECE_TYPES, SQUARES, OFF_BOARD,
+                   IllegalMoveError, PawnNeedsPromotionError,
+                   ZOBRIST_PIECE_KEYS, ZOBRIST_BLACK_KEY, ZOBRIST_CASTLING_KEYS,
+                   ZOBRIST_EN_PASSANT_KEYS, PIECE_SQUARE_TABLES)
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PIECE_LETTERS = "pnbrqk"
+EMPTY = -1
+
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_LETTERS = ((WHITE_KINGSIDE, "K"), (WHITE_QUEENSIDE, "Q"),
+                    (BLACK_KINGSIDE, "k"), (BLACK_QUEENSIDE, "q"))
+
+
+def _on_board(row: int, col: int) -> bool:
+    return 0 <= row <= 7 and 0 <= col <= 7
+
+
+def _leaper_table(offsets) -> List[int]:
+    """ Return the attack masks of a piece that jumps by the given offsets."""
+    table = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        bits = 0
+        for d_row, d_col in offsets:
+            if _on_board(row + d_row, col + d_col):
+                bits |= 1 << ((row + d_row) * 8 + col + d_col)
+        table.append(bits)
+    return table
+
+
+def _ray_table(d_row: int, d_col: int) -> List[int]:
+    """ Return, for every square, the squares reached by sliding in one direction."""
+    table = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        bits = 0
+        row, col = row + d_row, col + d_col
+        while _on_board(row, col):
+            bits |= 1 << (row * 8 + col)
+            row, col = row + d_row, col + d_col
+        table.append(bits)
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_table([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2),
+                                (1, 2), (2, -1), (2, 1)])
+KING_ATTACKS = _leaper_table([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1),
+                              (1, -1), (1, 0), (1, 1)])
+# indexed by Color.value, white pawns move towards row 0
+PAWN_ATTACKS = (_leaper_table([(-1, -1), (-1, 1)]),
+                _leaper_table([(1, -1), (1, 1)]))
+
+# (ray table, True if the ray runs towards higher square indices)
+ROOK_RAYS = [(_ray_table(d_row, d_col), d_row * 8 + d_col > 0)
+             for d_row, d_col in [(-1, 0), (0, 1), (1, 0), (0, -1)]]
+BISHOP_RAYS = [(_ray_table(d_row, d_col), d_row * 8 + d_col > 0)
+               for d_row, d_col in [(-1, 1), (1, 1), (1, -1), (-1, -1)]]
+QUEEN_RAYS = ROOK_RAYS + BISHOP_RAYS
+
+# the zobrist keys of chess.Board, indexed like BitBoard.bitboards
+PIECE_KEYS = [ZOBRIST_PIECE_KEYS[PIECE_TYPES[PIECE_LETTERS[piece % 6]],
+                                 Color(piece // 6)] for piece in range(12)]
+
+
+def square_value_table(square_values: dict) -> List[List[int]]:
+    """ Return the piece-square values of each of the twelve pieces on each
+    square, from tables given from white's point of view as in chess.Board."""
+    return [[square_values[PIECE_LETTERS[piece % 6]][square if piece < 6 else square ^ 56]
+             for square in range(64)] for piece in range(12)]
+
+
+SQUARE_VALUES = square_value_table(PIECE_SQUARE_TABLES)
+CASTLING_KEYS = [0] * 16
+for _mask in range(16):
+    for _right, _letter in CASTLING_LETTERS:
+        if _mask & _right:
+            CASTLING_KEYS[_mask] ^= ZOBRIST_CASTLING_KEYS[_letter]
+
+# castling rights that are lost when a piece moves from or to a square
+CASTLING_LOSS = [0] * 64
+CASTLING_LOSS[60] = WHITE_KINGSIDE | WHITE_QUEENSIDE  # e1
+CASTLING_LOSS[63] = WHITE_KINGSIDE  # h1
+CASTLING_LOSS[56] = WHITE_QUEENSIDE  # a1
+CASTLING_LOSS[4] = BLACK_KINGSIDE | BLACK_QUEENSIDE  # e8
+CASTLING_LOSS[7] = BLACK_KINGSIDE  # h8
+CASTLING_LOSS[0] = BLACK_QUEENSIDE  # a8
+
+
+def slider_attacks(square: int, occupied: int, rays) -> int:
+    """ Return the squares attacked from square by a piece sliding along rays."""
+    attacks = 0
+    for table, positive in rays:
+        ray = table[square]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray &= ~table[first]
+        attacks |= ray
+    return attacks
+
+
+def squares_of(bits: int):
+    """ Return a generator which yields the index of every set bit."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class BitBoard:
+    """ A chess board stored as bitboards.
+
+    bitboards:          Twelve 64 bit integers, indexed by color * 6 + piece type.
+    occupancy:          A 64 bit integer per color, indexed by Color.value.
+    squares:            A 64 element mailbox holding the bitboard index of the
+                        piece on each square, or EMPTY.
+    castling:           The castling rights as a bit mask.
+    ep_square:          The square index of the en passant target, or EMPTY.
+    half_move_clock:    The number of halfmoves, in terms of the 50 move draw rule.
+    full_move_number:   The number of full moves in a game. incremented every black move.
+    who:                The color of the current player.
+    undo_stack:         A (move, snapshot) pair for each move made with push.
+    zobrist_key:        A 64 bit hash of the position, equal to chess.Board's
+                        zobrist_key for the same position.
+    position_keys:      As in chess.Board.
+    square_values:      The piece-square value of each piece on each square.
+    positional:         The sum of the square_values of the pieces of each
+                        color, as in chess.Board.
+    status_cache:       As in chess.Board.
+    """
+    __slots__ = ('bitboards', 'occupancy', 'squares', 'castling', 'ep_square',
+                 'half_move_clock', 'full_move_number', 'who', 'undo_stack',
+                 'zobrist_key', 'position_keys', 'square_values', 'positional',
+                 'status_cache')
+
+    initial_setup = Board.initial_setup
+    empty = Board.empty
+    legal_move_cache_size = Board.default_legal_move_cache_size
+
+    def __init__(self, fen: str = None, square_values: dict = None):
+        if fen is None:
+            fen = BitBoard.initial_setup
+        fen = fen.split()
+
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.squares = [EMPTY] * 64
+        self.zobrist_key = 0
+        if square_values is None:
+            self.square_values = SQUARE_VALUES
+        elif isinstance(square_values, dict):
+            self.square_values = square_value_table(square_values)
+        else:
+            # already made by square_value_table, e.g. another board's
+            self.square_values = square_values
+        self.positional = [0, 0]
+        self.status_cache = OrderedDict()
+        row_idx, col_idx = 0, 0
+        for elem in fen[0]:
+            if elem.lower() in PIECE_LETTERS:
+                color = int(elem.islower())
+                self._put(row_idx * 8 + col_idx,
+                          color * 6 + PIECE_LETTERS.index(elem.lower()))
+                col_idx += 1
+            elif elem.isnumeric():
+                col_idx += int(elem)
+            elif elem == "/":
+                row_idx += 1
+                col_idx = 0
+            else:
+                raise Exception(f"unknown value in fen string: {elem}")
+
+        if fen[1] == "w":
+            self.who = Color.WHITE
+        else:
+            self.who = Color.BLACK
+        self.castling = 0
+        for right, letter in CASTLING_LETTERS:
+            if letter in fen[2]:
+                self.castling |= right
+        if fen[3] == "-":
+            self.ep_square = EMPTY
+        else:
+            row, col = Location.row_col_from_algebraic(fen[3])
+            self.ep_square = row * 8 + col
+        self.half_move_clock = int(fen[4])
+        self.full_move_number = int(fen[5])
+        self.undo_stack = []
+        if self.who is Color.BLACK:
+            self.zobrist_key ^= ZOBRIST_BLACK_KEY
+        self.zobrist_key ^= CASTLING_KEYS[self.castling]
+        if self.ep_square != EMPTY:
+            self.zobrist_key ^= ZOBRIST_EN_PASSANT_KEYS[self.ep_square % 8]
+        self.position_keys = [self.zobrist_key]
+
+    def _put(self, square: int, piece: int) -> None:
+        """ Place piece on an empty square."""
+        bit = 1 << square
+        self.bitboards[piece] |= bit
+        self.occupancy[piece // 6] |= bit
+        self.squares[square] = piece
+        self.zobrist_key ^= PIECE_KEYS[piece][square]
+        self.positional[piece // 6] += self.square_values[piece][square]
+
+    def _remove(self, square: int) -> int:
+        """ Remove and return the piece on square."""
+        piece = self.squares[square]
+        bit = 1 << square
+        self.bitboards[piece] ^= bit
+        self.occupancy[piece // 6] ^= bit
+        self.squares[square] = EMPTY
+        self.zobrist_key ^= PIECE_KEYS[piece][square]
+        self.positional[piece // 6] -= self.square_values[piece][square]
+        return piece
+
+    def copy(self):
+        """ Return a copy of self, including its undo_stack, without going
+        through a fen string. The status cache is shared, as in chess.Board."""
+        board = object.__new__(BitBoard)
+        (board.bitboards, board.occupancy, board.squares, board.who,
+         board.castling, board.ep_square, board.half_move_clock,
+         board.full_move_number, board.zobrist_key, board.positional) = self._state()
+        # pop restores the lists in a snapshot, so the copy needs its own
+        board.undo_stack = [(move, (bitboards[:], occupancy[:], squares[:],
+                                    *state, positional[:]))
+                            for move, (bitboards, occupancy, squares, *state,
+                                       positional) in self.undo_stack]
+        board.position_keys = self.position_keys[:]
+        board.square_values = self.square_values
+        board.status_cache = self.status_cache
+        return board
+
+    __copy__ = copy
+
+    def _state(self) -> tuple:
+        """ Return a snapshot of the mutable state of self."""
+        return (self.bitboards[:], self.occupancy[:], self.squares[:],
+                self.who, self.castling, self.ep_square, self.half_move_clock,
+                self.full_move_number, self.zobrist_key, self.positional[:])
+
+    def _restore(self, state: tuple) -> None:
+        """ Restore a snapshot taken by _state."""
+        (self.bitboards, self.occupancy, self.squares, self.who,
+         self.castling, self.ep_square, self.half_move_clock,
+         self.full_move_number, self.zobrist_key, self.positional) = state
+
+    def _apply(self, origin: int, target: int, promotion: str) -> None:
+        """ Make a move given as square indices, without checking legality."""
+        piece = self.squares[origin]
+        color, kind = divmod(piece, 6)
+        captured = self.squares[target]
+
+        if captured != EMPTY:
+            self._remove(target)
+        self._remove(origin)
+        self._put(target, piece)
+
+        ep_square = EMPTY
+        if kind == PAWN:
+            if target == self.ep_square and origin % 8 != target % 8:
+                self._remove(target + 8 if color == 0 else target - 8)
+            elif abs(origin - target) == 16:
+                ep_square = (origin + target) // 2
+            elif promotion is not None:
+                self._remove(target)
+                self._put(target, color * 6 + PIECE_LETTERS.index(promotion))
+        elif kind == KING and abs(origin - target) == 2:
+            if target > origin:
+                self._put(origin + 1, self._remove(origin + 3))
+            else:
+                self._put(origin - 1, self._remove(origin - 4))
+
+        if kind == PAWN or captured != EMPTY:
+            self.half_move_clock = 0
+        else:
+            self.half_move_clock += 1
+        if self.who is Color.BLACK:
+            self.full_move_number += 1
+        castling = self.castling & ~(CASTLING_LOSS[origin] | CASTLING_LOSS[target])
+        self.zobrist_key ^= CASTLING_KEYS[self.castling] ^ CASTLING_KEYS[castling]
+        self.castling = castling
+        if self.ep_square != EMPTY:
+            self.zobrist_key ^= ZOBRIST_EN_PASSANT_KEYS[self.ep_square % 8]
+        if ep_square != EMPTY:
+            self.zobrist_key ^= ZOBRIST_EN_PASSANT_KEYS[ep_square % 8]
+        self.ep_square = ep_square
+        self.who = Color.other(self.who)
+        self.zobrist_key ^= ZOBRIST_BLACK_KEY
+
+    def attacked(self, square: int, by: int) -> bool:
+        """ Return True if square is attacked by the pieces of color value by."""
+        bitboards = self.bitboards
+        base = by * 6
+        if PAWN_ATTACKS[1 - by][square] & bitboards[base + PAWN]:
+            return True
+        if KNIGHT_ATTACKS[square] & bitboards[base + KNIGHT]:
+            return True
+        if KING_ATTACKS[square] & bitboards[base + KING]:
+            return True
+        occupied = self.occupancy[0] | self.occupancy[1]
+        rooks = bitboards[base + ROOK] | bitboards[base + QUEEN]
+        if rooks and slider_attacks(square, occupied, ROOK_RAYS) & rooks:
+            return True
+        bishops = bitboards[base + BISHOP] | bitboards[base + QUEEN]
+        if bishops and slider_attacks(square, occupied,
+                                      BISHOP_RAYS) & bishops:
+            return True
+        return False
+
+    def attackers(self, square: int, by: int) -> int:
+        """ Return the bitboard of the pieces of color value by that attack
+        square."""
+        bitboards = self.bitboards
+        base = by * 6
+        occupied = self.occupancy[0] | self.occupancy[1]
+        return (PAWN_ATTACKS[1 - by][square] & bitboards[base + PAWN]) \
+            | (KNIGHT_ATTACKS[square] & bitboards[base + KNIGHT]) \
+            | (KING_ATTACKS[square] & bitboards[base + KING]) \
+            | (slider_attacks(square, occupied, ROOK_RAYS)
+               & (bitboards[base + ROOK] | bitboards[base + QUEEN])) \
+            | (slider_attacks(square, occupied, BISHOP_RAYS)
+               & (bitboards[base + BISHOP] | bitboards[base + QUEEN]))
+
+    def king_square(self, color: Color) -> int:
+        """ Return the square index of the king of the appropriate color."""
+        king = self.bitboards[color.value * 6 + KING]
+        if not king:
+            raise Exception("Something went wrong. King not found")
+        return king.bit_length() - 1
+
+    def pseudo_legal_moves(self, color: Color) -> List[tuple]:
+        """ Return (origin, target, promotion) tuples for every move of color,
+        not considering whether they would be 'moving into check'."""
+        us = color.value
+        base = us * 6
+        bitboards = self.bitboards
+        own = self.occupancy[us]
+        opp = self.occupancy[1 - us]
+        occupied = own | opp
+        moves = []
+
+        if us == 0:
+            forward, starting_row, last_row = -8, 6, 0
+        else:
+            forward, starting_row, last_row = 8, 1, 7
+        pawn_targets = opp
+        if color is self.who and self.ep_square != EMPTY:
+            pawn_targets |= 1 << self.ep_square
+        for origin in squares_of(bitboards[base + PAWN]):
+            targets = PAWN_ATTACKS[us][origin] & pawn_targets
+            one_sqr_fwd = origin + forward
+            if not occupied >> one_sqr_fwd & 1:
+                targets |= 1 << one_sqr_fwd
+                two_sqr_fwd = one_sqr_fwd + forward
+                if origin // 8 == starting_row and not occupied >> two_sqr_fwd & 1:
+                    targets |= 1 << two_sqr_fwd
+            for target in squares_of(targets):
+                if target // 8 == last_row:
+                    for promotion in "qrnb":
+                        moves.append((origin, target, promotion))
+                else:
+                    moves.append((origin, target, None))
+
+        for kind, rays in ((KNIGHT, None), (BISHOP, BISHOP_RAYS),
+                           (ROOK, ROOK_RAYS), (QUEEN, QUEEN_RAYS), (KING, None)):
+            for origin in squares_of(bitboards[base + kind]):
+                if kind == KNIGHT:
+                    targets = KNIGHT_ATTACKS[origin]
+                elif kind == KING:
+                    targets = KING_ATTACKS[origin]
+                else:
+                    targets = slider_attacks(origin, occupied, rays)
+                for target in squares_of(targets & ~own):
+                    moves.append((origin, target, None))
+
+        moves.extend(self._castling_moves(color, occupied))
+        return moves
+
+    def _castling_moves(self, color: Color, occupied: int) -> List[tuple]:
+        """ Return the castling moves available to color. Castling moves are
+        neither out of, through, nor into check."""
+        moves = []
+        if color is Color.WHITE:
+            king, kingside, queenside = 60, WHITE_KINGSIDE, WHITE_QUEENSIDE
+        else:
+            king, kingside, queenside = 4, BLACK_KINGSIDE, BLACK_QUEENSIDE
+        rook = color.value * 6 + ROOK
+        them = 1 - color.value
+        if not self.castling & (kingside | queenside) \
+                or self.squares[king] != color.value * 6 + KING \
+                or self.attacked(king, them):
+            return moves
+        if self.castling & kingside and self.squares[king + 3] == rook \
+                and not occupied & (0b11 << (king + 1)) \
+                and not self.attacked(king + 1, them) \
+                and not self.attacked(king + 2, them):
+            moves.append((king, king + 2, None))
+        if self.castling & queenside and self.squares[king - 4] == rook \
+                and not occupied & (0b111 << (king - 3)) \
+                and not self.attacked(king - 1, them) \
+                and not self.attacked(king - 2, them):
+            moves.append((king, king - 2, None))
+        return moves
+
+    def legal_moves(self, color: Color) -> List[tuple]:
+        """ Return (origin, target, promotion) tuples for every legal move of color."""
+        them = 1 - color.value
+        moves = []
+        for move in self.pseudo_legal_moves(color):
+            state = self._state()
+            self._apply(*move)
+            if not self.attacked(self.king_square(color), them):
+                moves.append(move)
+            self._restore(state)
+        return moves
+
+    @property
+    def all_legal_moves(self) -> List[Move]:
+        """ Return a list of all legal moves for the current player to make."""
+        return [
+            Move(SQUARES[origin], SQUARES[target], promotion)
+            for origin, target, promotion in self.legal_moves(self.who)
+        ]
+
+    def make_move(self, move: Move, trusted: bool = False) -> None:
+        """ If given move is illegal, raise IllegalMoveError, otherwise make
+        the move. As in chess.Board, a trusted move is made without checks."""
+        if trusted:
+            self.push(move)
+            return
+        origin = move.origin
+        target = move.target
+        self.is_legal_move_general(origin, target)
+        origin_idx = origin.index
+        target_idx = target.index
+        if self.squares[origin_idx] % 6 == PAWN and target.row in (0, 7) \
+                and move.promotion is None:
+            raise PawnNeedsPromotionError(
+                f'To move the pawn to {target.algebraic}, specify the ' \
+                + 'type of piece to promote the pawn to. Select from ' \
+                + f'[q, r, n, b]. The move given was {move}'
+            )
+        if (origin_idx, target_idx,
+                move.promotion) not in self.legal_moves(self.who):
+            raise IllegalMoveError("Move is not legal.")
+        self.push(move)
+
+    def push(self, move: Move) -> None:
+        """ Make the move without checking whether it is legal. The move can
+        be taken back with pop."""
+        self.undo_stack.append((move, self._state()))
+        self._apply(move.origin.index,
+                    move.target.index, move.promotion)
+        self.position_keys.append(self.zobrist_key)
+
+    def pop(self) -> Move:
+        """ Take back the last move made with push or make_move and return it."""
+        move, state = self.undo_stack.pop()
+        self._restore(state)
+        self.position_keys.pop()
+        return move
+
+    def check(self, color: Color) -> bool:
+        """ Return True if color is in check, False otherwise."""
+        return self.attacked(self.king_square(color), 1 - color.value)
+
+    def checkers(self, color: Color) -> list:
+        """ Return the pieces giving check to the king of color."""
+        mask = self.attackers(self.king_square(color), 1 - color.value)
+        return [self.get_piece_at(SQUARES[square])
+                for square in squares_of(mask)]
+
+    def checkmate(self, color: Color) -> bool:
+        """ Return True if color is in checkmate, False otherwise."""
+        return self.check(color) and not self.legal_moves(color)
+
+    def has_legal_move(self, color: Color) -> bool:
+        """ Return True if color has a legal move, stopping at the first one
+        found."""
+        them = 1 - color.value
+        for move in self.pseudo_legal_moves(color):
+            state = self._state()
+            self._apply(*move)
+            legal = not self.attacked(self.king_square(color), them)
+            self._restore(state)
+            if legal:
+                return True
+        return False
+
+    has_winner = Board.has_winner
+    repetitions = Board.repetitions
+    status = Board.status
+    is_legal_move_general = Board.is_legal_move_general
+    perft = Board.perft
+    divide = Board.divide
+
+    def get_piece_at(self, location: Location):
+        """ Return a piece describing what is located at location. The piece
+        is created on demand and is only meant for inspection."""
+        piece = self.squares[location.index]
+        if piece == EMPTY:
+            return BitBoard.empty
+        color, kind = divmod(piece, 6)
+        return PIECE_TYPES[PIECE_LETTERS[kind]](location, Color(color), self)
+
+    @property
+    def piece_counts(self) -> dict:
+        """ The number of pieces of each color, keyed by piece letter."""
+        return {color: {letter: bin(self.bitboards[color.value * 6 + kind]).count('1')
+                        for kind, letter in enumerate(PIECE_LETTERS)}
+                for color in Color}
+
+    @property
+    def castling_rights(self) -> List[str]:
+        """ A list describing each player's castling rights."""
+        rights = [letter for right, letter in CASTLING_LETTERS
+                  if self.castling & right]
+        return rights or ['-']
+
+    @property
+    def en_passant_target(self) -> Location:
+        """ The location of the en passant target."""
+        if self.ep_square == EMPTY:
+            return OFF_BOARD
+        return SQUARES[self.ep_square]
+
+    def _letter_at(self, square: int) -> str:
+        piece = self.squares[square]
+        if piece < 6:
+            return PIECE_LETTERS[piece].upper()
+        return PIECE_LETTERS[piece - 6]
+
+    @property
+    def fen_str(self) -> str:
+        """ The fen string for self."""
+        rows = []
+        for row_idx in range(8):
+            row, empty_sqr_count = "", 0
+            for square in range(row_idx * 8, row_idx * 8 + 8):
+                if self.squares[square] == EMPTY:
+                    empty_sqr_count += 1
+                    continue
+                if empty_sqr_count > 0:
+                    row += str(empty_sqr_count)
+                    empty_sqr_count = 0
+                row += self._letter_at(square)
+            if empty_sqr_count > 0:
+                row += str(empty_sqr_count)
+            rows.append(row)
+        return " ".join([
+            "/".join(rows),
+            self.who.name[0].lower(), "".join(self.castling_rights),
+            self.en_passant_target.algebraic,
+            str(self.half_move_clock),
+            str(self.full_move_number)
+        ])
+
+    def __str__(self) -> str:
+        """ Return a human readable string displaying the board."""
+        str_rep = "   a b c d e f g h\n"
+        for row_idx in range(8):
+            str_rep += str(8 - row_idx) + "  "
+            for square in range(row_idx * 8, row_idx * 8 + 8):
+                if self.squares[square] == EMPTY:
+                    str_rep += "_"
+                else:
+                    str_rep += str(self.get_piece_at(SQUARES[square]))
+                str_rep += " "
+            str_rep += " " + str(8 - row_idx) + "\n"
+        str_rep += "   a b c d e f g h"
+        str_rep += '\n' + self.fen_str + '\n'
+        return str_rep
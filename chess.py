@@ -2,12 +2,13 @@
 """ A chess engine."""
 
 import os
+import random
+from collections import OrderedDict
 from enum import Enum
-from typing import List
+from typing import Dict, List
 
 checkmatecount = 0
 all_legal_moves_count = 0
-is_legal_dest_count = 0
 
 
 class Color(Enum):
@@ -25,22 +26,53 @@ class Color(Enum):
         raise Exception(f"unknown color: {color}")
 
 
+class Status(Enum):
+    """ The state of a game, as returned by Board.status."""
+    ONGOING = 0
+    CHECKMATE = 1
+    STALEMATE = 2
+    FIFTY_MOVES = 3
+    REPETITION = 4
+
+
 class Location:
     """ Hold information about a particular location.
-    row_col refers to the indices of the location in an 8x8 matrix.
+    row_col refers to the indices of the location in an 8x8 matrix, and index
+    to row * 8 + col, or OFF_BOARD_INDEX if the location is off the board.
+    The 64 locations on the board are interned in SQUARES, so constructing one
+    returns the shared object and they can be compared by identity.
     """
-    def __init__(self, algebraic: str = None, row_col: tuple = None):
+    __slots__ = ('row', 'col', 'algebraic', 'index')
+
+    def __new__(cls, algebraic: str = None, row_col: tuple = None):
         if algebraic is not None:
-            self.algebraic = algebraic
-            if self.algebraic == "-":
-                self.row = self.col = -1
-            else:
-                self.row, self.col = Location.row_col_from_algebraic(algebraic)
-        elif row_col is not None:
-            self.row, self.col = row_col
-            self.algebraic = Location.algebraic_from_row_col(row_col)
-        else:
+            location = _SQUARES_BY_NAME.get(algebraic)
+            if location is not None:
+                return location
+            row_col = Location.row_col_from_algebraic(algebraic)
+        elif row_col is None:
             raise Exception('Location instantiated with bad inputs.')
+        row, col = row_col
+        if 0 <= row <= 7 and 0 <= col <= 7:
+            return SQUARES[row * 8 + col]
+        if algebraic is None:
+            algebraic = Location.algebraic_from_row_col(row_col)
+        return cls.create(row, col, algebraic)
+
+    @classmethod
+    def create(cls, row: int, col: int, algebraic: str):
+        """ Return a new location, bypassing the interned squares."""
+        location = object.__new__(cls)
+        location.row, location.col = row, col
+        location.algebraic = algebraic
+        if 0 <= row <= 7 and 0 <= col <= 7:
+            location.index = row * 8 + col
+        else:
+            location.index = OFF_BOARD_INDEX
+        return location
+
+    def __reduce__(self):
+        return Location, (self.algebraic,)
 
     @classmethod
     def algebraic_from_row_col(cls, row_col: tuple) -> str:
@@ -61,24 +93,76 @@ class Location:
     @property
     def in_bounds(self) -> bool:
         """ Check if self is in bounds."""
-        return 0 <= self.row <= 7 and 0 <= self.col <= 7
+        return self.index != OFF_BOARD_INDEX
 
     def __eq__(self, other) -> bool:
-        return self.algebraic == other.algebraic
+        return self is other or (isinstance(other, Location)
+                                 and self.index == OFF_BOARD_INDEX
+                                 and self.algebraic == other.algebraic)
+
+    def __hash__(self) -> int:
+        return hash(self.algebraic)
+
+    def __repr__(self) -> str:
+        return self.algebraic
+
+
+OFF_BOARD_INDEX = 64
+SQUARES = [Location.create(row, col, Location.algebraic_from_row_col((row, col)))
+           for row in range(8) for col in range(8)]
+OFF_BOARD = Location.create(-1, -1, "-")
+_SQUARES_BY_NAME = {square.algebraic: square for square in SQUARES + [OFF_BOARD]}
+_SQUARES_BY_INDEX = SQUARES + [OFF_BOARD]
+
+PROMOTIONS = (None, 'q', 'r', 'n', 'b')
+_PROMOTION_INDEX = {promotion: index for index, promotion in enumerate(PROMOTIONS)}
 
 
 class Move:
-    """ A class to hold information about a particular move."""
+    """ A class to hold information about a particular move.
+
+    A move is a view over the integer code, which packs the index of the
+    origin in bits 0-6, the index of the target in bits 7-13, the index of
+    the promotion in PROMOTIONS in bits 14-16. Moves compare and hash by
+    their code.
+    """
+    __slots__ = ('code',)
+
     def __init__(self, origin: Location, target: Location, promotion=None):
-        self.origin = origin
-        self.target = target
-        self.promotion = promotion
+        promotion_index = _PROMOTION_INDEX.get(promotion)
+        if promotion_index is None:
+            raise IllegalMoveError(f'Unknown promotion: {promotion}')
+        self.code = origin.index | target.index << 7 | promotion_index << 14
+
+    @classmethod
+    def from_code(cls, code: int):
+        """ Return the move with the given code."""
+        move = cls.__new__(cls)
+        move.code = code
+        return move
+
+    @property
+    def origin(self) -> Location:
+        """ The location the piece moves from."""
+        return _SQUARES_BY_INDEX[self.code & 127]
+
+    @property
+    def target(self) -> Location:
+        """ The location the piece moves to."""
+        return _SQUARES_BY_INDEX[self.code >> 7 & 127]
+
+    @property
+    def promotion(self):
+        """ The letter of the piece a pawn is promoted to, or None."""
+        return PROMOTIONS[self.code >> 14 & 7]
 
     def __eq__(self, other) -> bool:
-        eq_origins = self.origin == other.origin
-        eq_targets = self.target == other.target
-        eq_promotions = self.promotion == other.promotion
-        return eq_origins and eq_targets and eq_promotions
+        if not isinstance(other, Move):
+            return NotImplemented
+        return self.code == other.code
+
+    def __hash__(self) -> int:
+        return self.code
 
     def __repr__(self) -> str:
         if self.promotion:
@@ -96,18 +180,50 @@ class Board:
     full_move_number:   The number of full moves in a game. incremented every black move.
     en_passant_target:  The location of the en passant target.
     who:                The color of the current player.
+    undo_stack:         A record for each move made with push, used by pop to take it back.
+    zobrist_key:        A 64 bit hash of the position, updated incrementally as moves are made.
+    position_keys:      The zobrist_key of every position of the game so far, the current
+                        one last, used to detect repetitions.
+    legal_move_cache:   The legal moves of recently seen positions, keyed by (zobrist_key, color).
+    legal_move_cache_size: The number of positions legal_move_cache keeps.
+    status_cache:       Whether recently seen positions are checkmate, stalemate or
+                        neither, keyed by zobrist_key. It keeps legal_move_cache_size
+                        positions too.
+    legal_move_set_cache: The zobrist_key of the last position validated by make_move
+                        and the set of its legal moves.
+    rank_fens:          The piece placement fen field of each row, or None if the row
+                        has changed since it was last written.
+    fen_cache:          The last fen_str, and the (zobrist_key, half_move_clock,
+                        full_move_number) it was written for.
+    pieces:             The set of pieces on the board of each color.
+    kings:              The king of each color.
+    occupancy:          An 8x8 matrix for each color, with a 1 where a piece of that color stands.
+    piece_counts:       The number of pieces of each color, keyed by piece letter.
+    square_values:      The piece-square tables used for positional, keyed by piece letter.
+    positional:         The sum of the square_values of the pieces of each color, indexed by Color.value.
     """
 
+    __slots__ = ('board_rep', 'pieces', 'kings', 'occupancy', '_who',
+                 'castling_rights', 'en_passant_target', 'half_move_clock',
+                 'full_move_number', 'undo_stack', 'zobrist_key', 'position_keys',
+                 'legal_move_cache', 'legal_move_cache_size', 'status_cache',
+                 'legal_move_set_cache', 'rank_fens', 'fen_cache',
+                 'piece_counts',
+                 'square_values', 'positional')
+
     initial_setup = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
     empty = ()
+    default_legal_move_cache_size = 4096
 
-    def __init__(self, fen: str = None):
+    def __init__(self, fen: str = None, square_values: dict = None):
         if fen is None:
             fen = Board.initial_setup
         fen = fen.split()
         position_field = list(fen[0]) + ["/"]
 
         self.board_rep, row = [], []
+        self.pieces = {Color.WHITE: set(), Color.BLACK: set()}
+        self.kings = {}
         row_idx, col_idx = 0, 0
         for elem in position_field:
             if elem.lower() in PIECE_TYPES:
@@ -115,6 +231,9 @@ class Board:
                 piece = PIECE_TYPES[elem.lower()](Location(row_col=(row_idx,
                                                                     col_idx)),
                                                   color, self)
+                self.pieces[color].add(piece)
+                if isinstance(piece, King):
+                    self.kings[color] = piece
                 row.append(piece)
                 col_idx += 1
             elif elem.isnumeric():
@@ -130,24 +249,129 @@ class Board:
                 raise Exception(f"unknown value in fen string: {elem}")
 
         if fen[1] == "w":
-            self.who = Color.WHITE
+            self._who = Color.WHITE
         else:
-            self.who = Color.BLACK
+            self._who = Color.BLACK
         self.castling_rights = list(fen[2])
         self.en_passant_target = Location(algebraic=fen[3])
         self.half_move_clock = int(fen[4])
         self.full_move_number = int(fen[5])
+        self.undo_stack = []
+        self.zobrist_key = self.compute_zobrist_key()
+        self.position_keys = [self.zobrist_key]
+        self.legal_move_cache = OrderedDict()
+        self.legal_move_cache_size = Board.default_legal_move_cache_size
+        self.status_cache = OrderedDict()
+        self.legal_move_set_cache = (None, frozenset())
+        self.rank_fens = [None] * 8
+        self.fen_cache = (None, None)
+        self.occupancy = {color: self.color_pieces(color) for color in Color}
+        if square_values is None:
+            square_values = PIECE_SQUARE_TABLES
+        self.square_values = square_values
+        self.piece_counts = {color: dict.fromkeys(PIECE_TYPES, 0) for color in Color}
+        self.positional = [0, 0]
+        for color in Color:
+            for piece in self.pieces[color]:
+                self.piece_counts[color][piece.letter] += 1
+                self.positional[color.value] += self.square_value(piece, piece.location)
+
+    def copy(self):
+        """ Return a copy of self, including its undo_stack, without going
+        through a fen string. Pieces refer to their board, so each one is
+        copied, but locations, moves and the piece-square tables are shared.
+        The legal move and status caches only depend on the position, so
+        they are shared too."""
+        board = object.__new__(Board)
+        copies = {}
+
+        def copy_piece(piece):
+            if piece is Board.empty:
+                return piece
+            new = copies.get(id(piece))
+            if new is None:
+                new = object.__new__(type(piece))
+                new.location, new.color, new.board = piece.location, piece.color, board
+                copies[id(piece)] = new
+            return new
+
+        board.board_rep = [[copy_piece(piece) for piece in row] for row in self.board_rep]
+        board.pieces = {color: {copy_piece(piece) for piece in pieces}
+                        for color, pieces in self.pieces.items()}
+        board.kings = {color: copy_piece(king) for color, king in self.kings.items()}
+        board.occupancy = {color: [row[:] for row in rows]
+                           for color, rows in self.occupancy.items()}
+        board._who = self._who
+        board.castling_rights = self.castling_rights[:]
+        board.en_passant_target = self.en_passant_target
+        board.half_move_clock = self.half_move_clock
+        board.full_move_number = self.full_move_number
+        # pop restores the lists in a record, so the copy needs its own
+        board.undo_stack = [
+            (move, copy_piece(moved), copy_piece(captured), captured_location,
+             castling_rights[:], *record, positional[:])
+            for (move, moved, captured, captured_location, castling_rights,
+                 *record, positional) in self.undo_stack]
+        board.zobrist_key = self.zobrist_key
+        board.position_keys = self.position_keys[:]
+        board.legal_move_cache = self.legal_move_cache
+        board.legal_move_cache_size = self.legal_move_cache_size
+        board.status_cache = self.status_cache
+        board.legal_move_set_cache = self.legal_move_set_cache
+        board.rank_fens = self.rank_fens[:]
+        board.fen_cache = self.fen_cache
+        board.piece_counts = {color: dict(counts)
+                              for color, counts in self.piece_counts.items()}
+        board.square_values = self.square_values
+        board.positional = self.positional[:]
+        return board
+
+    __copy__ = copy
 
-    def make_move(self, move: Move) -> None:
+    @property
+    def who(self) -> Color:
+        """ The color of the current player."""
+        return self._who
+
+    @who.setter
+    def who(self, color: Color) -> None:
+        if color is not self._who:
+            self.zobrist_key ^= ZOBRIST_BLACK_KEY
+        self._who = color
+
+    def square_value(self, piece, location: Location) -> int:
+        """ Return the piece-square table value of piece standing on location."""
+        index = location.index if piece.color is Color.WHITE else location.index ^ 56
+        return self.square_values[piece.letter][index]
+
+    def compute_zobrist_key(self) -> int:
+        """ Return the zobrist key of the position, computed from scratch."""
+        key = 0
+        for piece in self.flat_board_rep:
+            if piece is not Board.empty:
+                key ^= zobrist_piece_key(piece, piece.location)
+        if self.who is Color.BLACK:
+            key ^= ZOBRIST_BLACK_KEY
+        for right in self.castling_rights:
+            key ^= ZOBRIST_CASTLING_KEYS.get(right, 0)
+        if self.en_passant_target.in_bounds:
+            key ^= ZOBRIST_EN_PASSANT_KEYS[self.en_passant_target.col]
+        return key
+
+    def make_move(self, move: Move, trusted: bool = False) -> None:
         """ If given move is illegal, raise IllegalMoveError, otherwise make
-        the move."""
+        the move. If trusted is True, the move is known to be legal, e.g.
+        because it was taken from all_legal_moves, and is made without any
+        checks."""
+        if trusted:
+            self.push(move)
+            return
         origin = move.origin
         target = move.target
         promotion = False
         piece_to_move = self.board_rep[origin.row][origin.col]
 
-        pawn_was_moved = isinstance(piece_to_move, Pawn)
-        if pawn_was_moved:
+        if isinstance(piece_to_move, Pawn):
             if target.row == piece_to_move.last_row:
                 if move.promotion is None:
                     raise PawnNeedsPromotionError(
@@ -157,16 +381,54 @@ class Board:
                     )
                 promotion = True
 
-        # if the move is not legal, IllegalMoveError will be thrown in the next two lines
+        # if the move is not legal, IllegalMoveError will be thrown in the next five lines
         self.is_legal_move_general(origin, target)
-        piece_to_move.is_legal(move)
         if not promotion and move.promotion:
             raise IllegalMoveError(f'Promotion is not valid for this move.')
+        if move not in self.legal_move_set():
+            raise IllegalMoveError("Move is not legal.")
+
+        self.push(move)
+
+    def push(self, move: Move) -> None:
+        """ Make the move without checking whether it is legal. The move can
+        be taken back with pop."""
+        origin = move.origin
+        target = move.target
+        piece_to_move = self.board_rep[origin.row][origin.col]
+        # en passant captures and castling rooks stay on the origin row
+        self.rank_fens[origin.row] = self.rank_fens[target.row] = None
+
+        pawn_was_moved = isinstance(piece_to_move, Pawn)
+        en_passant_capture = self.en_passant_target is target and pawn_was_moved
+        if en_passant_capture:
+            captured_location = SQUARES[origin.row * 8 + target.col]
+        else:
+            captured_location = target
+        captured_piece = self.board_rep[captured_location.row][
+            captured_location.col]
+        self.undo_stack.append(
+            (move, piece_to_move, captured_piece, captured_location,
+             self.castling_rights[:], self.en_passant_target,
+             self.half_move_clock, self.full_move_number, self.who,
+             self.zobrist_key, self.positional[:]))
+
+        self.zobrist_key ^= zobrist_piece_key(piece_to_move, origin)
+        if captured_piece is not Board.empty:
+            self.zobrist_key ^= zobrist_piece_key(captured_piece,
+                                                  captured_location)
+            self.pieces[captured_piece.color].remove(captured_piece)
+            self.occupancy[captured_piece.color][captured_location.row][
+                captured_location.col] = 0
+            self.piece_counts[captured_piece.color][captured_piece.letter] -= 1
+            self.positional[captured_piece.color.value] -= self.square_value(
+                captured_piece, captured_location)
+        self.positional[piece_to_move.color.value] -= self.square_value(
+            piece_to_move, origin)
 
-        en_passant_capture = self.en_passant_target == target and pawn_was_moved
         self.update_en_passant_target(origin, target, pawn_was_moved)
         self.update_clocks(target, en_passant_capture, pawn_was_moved)
-        self.update_castling_rights(origin)
+        self.update_castling_rights(origin, target)
         castling_occured = isinstance(
             piece_to_move, King) and abs(origin.col - target.col) > 1
         if castling_occured:
@@ -178,34 +440,104 @@ class Board:
                 castle_to_move = self.board_rep[origin.row][7]
                 castle_target_col = target.col - 1
             castle_orig_location = castle_to_move.location
-            castle_to_move.location = Location(row_col=(origin.row,
-                                                        castle_target_col))
+            castle_to_move.location = SQUARES[origin.row * 8 + castle_target_col]
             self.board_rep[castle_to_move.location.row][
                 castle_to_move.location.col] = castle_to_move
             self.board_rep[castle_orig_location.row][
                 castle_orig_location.col] = Board.empty
-
-        if promotion:
+            own_squares = self.occupancy[castle_to_move.color]
+            own_squares[castle_orig_location.row][castle_orig_location.col] = 0
+            own_squares[castle_to_move.location.row][castle_to_move.location.col] = 1
+            self.zobrist_key ^= zobrist_piece_key(castle_to_move,
+                                                  castle_orig_location)
+            self.zobrist_key ^= zobrist_piece_key(castle_to_move,
+                                                  castle_to_move.location)
+            self.positional[castle_to_move.color.value] += self.square_value(
+                castle_to_move, castle_to_move.location) - self.square_value(
+                    castle_to_move, castle_orig_location)
+
+        if move.promotion:
+            self.pieces[piece_to_move.color].remove(piece_to_move)
             piece_to_move = PIECE_TYPES[move.promotion](
                 location=target,
                 color=piece_to_move.color,
                 board=piece_to_move.board)
+            self.pieces[piece_to_move.color].add(piece_to_move)
+            self.piece_counts[piece_to_move.color]['p'] -= 1
+            self.piece_counts[piece_to_move.color][move.promotion] += 1
+        self.positional[piece_to_move.color.value] += self.square_value(
+            piece_to_move, target)
+        self.zobrist_key ^= zobrist_piece_key(piece_to_move, target)
         self.who = Color.other(self.who)
         piece_to_move.location = target
         self.board_rep[target.row][target.col] = piece_to_move
         self.board_rep[origin.row][origin.col] = Board.empty
+        own_squares = self.occupancy[piece_to_move.color]
+        own_squares[origin.row][origin.col] = 0
+        own_squares[target.row][target.col] = 1
         if en_passant_capture:
             self.board_rep[origin.row][target.col] = Board.empty
+        self.position_keys.append(self.zobrist_key)
+
+    def pop(self) -> Move:
+        """ Take back the last move made with push or make_move and return it."""
+        (move, moved_piece, captured_piece, captured_location,
+         self.castling_rights, self.en_passant_target, self.half_move_clock,
+         self.full_move_number, self._who, self.zobrist_key,
+         self.positional) = self.undo_stack.pop()
+        self.position_keys.pop()
+        origin = move.origin
+        target = move.target
+        self.rank_fens[origin.row] = self.rank_fens[target.row] = None
+
+        if move.promotion:
+            own_pieces = self.pieces[moved_piece.color]
+            own_pieces.remove(self.board_rep[target.row][target.col])
+            own_pieces.add(moved_piece)
+            self.piece_counts[moved_piece.color]['p'] += 1
+            self.piece_counts[moved_piece.color][move.promotion] -= 1
+        own_squares = self.occupancy[moved_piece.color]
+        own_squares[target.row][target.col] = 0
+        own_squares[origin.row][origin.col] = 1
+        if captured_piece is not Board.empty:
+            self.pieces[captured_piece.color].add(captured_piece)
+            self.occupancy[captured_piece.color][captured_location.row][
+                captured_location.col] = 1
+            self.piece_counts[captured_piece.color][captured_piece.letter] += 1
+        self.board_rep[target.row][target.col] = Board.empty
+        self.board_rep[captured_location.row][
+            captured_location.col] = captured_piece
+        moved_piece.location = origin
+        self.board_rep[origin.row][origin.col] = moved_piece
+
+        castling_occured = isinstance(
+            moved_piece, King) and abs(origin.col - target.col) > 1
+        if castling_occured:
+            king_moved_left = origin.col > target.col
+            if king_moved_left:
+                castle_col, castle_orig_col = target.col + 1, 0
+            else:
+                castle_col, castle_orig_col = target.col - 1, 7
+            castle_to_move = self.board_rep[origin.row][castle_col]
+            castle_to_move.location = SQUARES[origin.row * 8 + castle_orig_col]
+            self.board_rep[origin.row][castle_orig_col] = castle_to_move
+            self.board_rep[origin.row][castle_col] = Board.empty
+            own_squares[origin.row][castle_orig_col] = 1
+            own_squares[origin.row][castle_col] = 0
+        return move
 
     def update_en_passant_target(self, origin: Location, target: Location,
                                  pawn_was_moved: bool) -> None:
         """ Update the en passant target."""
+        if self.en_passant_target.in_bounds:
+            self.zobrist_key ^= ZOBRIST_EN_PASSANT_KEYS[
+                self.en_passant_target.col]
         if pawn_was_moved and abs(origin.row - target.row) == 2:
             en_passant_row = (origin.row + target.row) // 2
-            self.en_passant_target = Location(row_col=(en_passant_row,
-                                                       target.col))
+            self.en_passant_target = SQUARES[en_passant_row * 8 + target.col]
+            self.zobrist_key ^= ZOBRIST_EN_PASSANT_KEYS[target.col]
         else:
-            self.en_passant_target = Location(algebraic="-")
+            self.en_passant_target = OFF_BOARD
 
     def update_clocks(
         self,
@@ -223,23 +555,28 @@ class Board:
         if self.who is Color.BLACK:
             self.full_move_number += 1
 
-    def update_castling_rights(self, origin: Location) -> None:
-        """ Update the castling rights."""
+    def update_castling_rights(self, origin: Location,
+                               target: Location = None) -> None:
+        """ Update the castling rights. Rights are lost when the king moves,
+        or when a piece moves from or to a castle's starting corner."""
         piece_to_move = self.board_rep[origin.row][origin.col]
         if len(self.castling_rights) > 0:
             castling_rights_to_remove = []
-            if origin.row == 0 and origin.col == 0:
-                castling_rights_to_remove.extend("q")
-            elif origin.row == 0 and origin.col == 7:
-                castling_rights_to_remove.extend("k")
-            elif piece_to_move.color == Color.BLACK and isinstance(
+            for location in (origin, target):
+                if location is None:
+                    continue
+                if location.row == 0 and location.col == 0:
+                    castling_rights_to_remove.extend("q")
+                elif location.row == 0 and location.col == 7:
+                    castling_rights_to_remove.extend("k")
+                elif location.row == 7 and location.col == 0:
+                    castling_rights_to_remove.extend("Q")
+                elif location.row == 7 and location.col == 7:
+                    castling_rights_to_remove.extend("K")
+            if piece_to_move.color == Color.BLACK and isinstance(
                     piece_to_move, King):
                 castling_rights_to_remove.extend("k")
                 castling_rights_to_remove.extend("q")
-            elif origin.row == 7 and origin.col == 0:
-                castling_rights_to_remove.extend("Q")
-            elif origin.row == 7 and origin.col == 7:
-                castling_rights_to_remove.extend("K")
             elif piece_to_move.color == Color.WHITE and isinstance(
                     piece_to_move, King):
                 castling_rights_to_remove.extend("K")
@@ -247,19 +584,111 @@ class Board:
             for elem in castling_rights_to_remove:
                 if elem in self.castling_rights:
                     self.castling_rights.remove(elem)
+                    self.zobrist_key ^= ZOBRIST_CASTLING_KEYS[elem]
         if not self.castling_rights:
             self.castling_rights = ['-']
 
     def check(self, color: Color) -> bool:
         """ Return True if color is in check, False otherwise."""
         king_location = self.player_king(color).location
+        return bool(self.attackers(king_location, Color.other(color), first_only=True))
+
+    def checkers(self, color: Color) -> list:
+        """ Return the pieces giving check to the king of color."""
+        king_location = self.player_king(color).location
+        return self.attackers(king_location, Color.other(color))
+
+    def attackers(self, location: Location, color: Color,
+                  first_only: bool = False) -> list:
+        """ Return the color pieces attacking location, found by walking out
+        from location along the lines a piece could attack it from. If
+        first_only, stop at the first attacker found."""
+        board_rep = self.board_rep
+        row, col = location.row, location.col
+        found = []
+
+        def add(piece) -> bool:
+            found.append(piece)
+            return first_only
+
+        for step_row, step_col in KNIGHT_DIRECTIONS:
+            r, c = row + step_row, col + step_col
+            if 0 <= r <= 7 and 0 <= c <= 7:
+                piece = board_rep[r][c]
+                if piece is not Board.empty and piece.color is color \
+                        and type(piece) is Knight and add(piece):
+                    return found
+
+        pawn_row = row + 1 if color is Color.WHITE else row - 1
+        if 0 <= pawn_row <= 7:
+            for c in (col - 1, col + 1):
+                if 0 <= c <= 7:
+                    piece = board_rep[pawn_row][c]
+                    if piece is not Board.empty and piece.color is color \
+                            and type(piece) is Pawn and add(piece):
+                        return found
+
+        for (step_row, step_col), sliders in SLIDER_DIRECTIONS:
+            r, c = row + step_row, col + step_col
+            distance = 1
+            while 0 <= r <= 7 and 0 <= c <= 7:
+                piece = board_rep[r][c]
+                if piece is not Board.empty:
+                    if piece.color is color and (type(piece) in sliders or
+                                                 distance == 1 and type(piece) is King):
+                        if add(piece):
+                            return found
+                    break
+                r, c = r + step_row, c + step_col
+                distance += 1
+        return found
+
+    def pins_and_checks(self, color: Color) -> tuple:
+        """ Return (evasions, pins) describing where the pieces of color other
+        than the king may move to. evasions is None if color is not in check,
+        otherwise the set of square indices that capture or block the
+        checking piece, which is empty in double check. pins maps the
+        square index of each pinned piece to the squares along its pin ray."""
+        board_rep = self.board_rep
+        king_location = self.player_king(color).location
+        row, col = king_location.row, king_location.col
         opp_color = Color.other(color)
-        for piece in self.flat_board_rep:
-            if piece is not Board.empty and piece.color is opp_color:
-                for move in piece.move_generator():
-                    if move.target == king_location:
-                        return True
-        return False
+
+        checkers = self.attackers(king_location, opp_color)
+        if not checkers:
+            evasions = None
+        elif len(checkers) > 1:
+            evasions = set()
+        else:
+            checker = checkers[0]
+            evasions = {checker.location.index}
+            if type(checker) in (Rook, Bishop, Queen):
+                step_row = (checker.row > row) - (checker.row < row)
+                step_col = (checker.col > col) - (checker.col < col)
+                r, c = row + step_row, col + step_col
+                while (r, c) != (checker.row, checker.col):
+                    evasions.add(r * 8 + c)
+                    r, c = r + step_row, c + step_col
+
+        pins = {}
+        for (step_row, step_col), sliders in SLIDER_DIRECTIONS:
+            ray = []
+            pinned = None
+            r, c = row + step_row, col + step_col
+            while 0 <= r <= 7 and 0 <= c <= 7:
+                ray.append(r * 8 + c)
+                piece = board_rep[r][c]
+                if piece is not Board.empty:
+                    if piece.color is color:
+                        if pinned is not None:
+                            break
+                        pinned = r * 8 + c
+                    else:
+                        if pinned is not None and type(piece) in sliders:
+                            pins[pinned] = set(ray)
+                        break
+                r, c = r + step_row, c + step_col
+        return evasions, pins
 
     def checkmate(self, color: Color) -> bool:
         """ Return True if color is in checkmate, False otherwise."""
@@ -269,8 +698,8 @@ class Board:
 
         if self.check(color) is False:
             return False
-        for piece in self.color_pieces_flat(color):
-            if piece.all_legal_moves:  # if there's any legal moves, no check mate
+        for moves in self.legal_moves_by_piece(color).values():
+            if moves:  # if there's any legal moves, no check mate
                 return False
         return True
 
@@ -289,62 +718,125 @@ class Board:
         return cur_player_bit_arr
 
     def color_pieces_flat(self, color: Color):
-        """ Return a list of color pieces."""
-        pieces = []
-        for piece in self.flat_board_rep:
-            if piece is not Board.empty and piece.color is color:
-                pieces.append(piece)
-        return pieces
+        """ Return a list of color pieces, in the order they appear on the
+        board from a8 to h1."""
+        return sorted(self.pieces[color],
+                      key=lambda piece: piece.row * 8 + piece.col)
 
     def player_king(self, color: Color):
         """ Return the king of the appropriate color."""
-        for piece in self.color_pieces_flat(color):
-            if isinstance(piece, King):
-                return piece
-        raise Exception("Something went wrong. King not found")
+        king = self.kings.get(color)
+        if king is None:
+            raise Exception("Something went wrong. King not found")
+        return king
+
+    def legal_move_set(self) -> frozenset:
+        """ Return the set of legal moves of the player to move, for
+        checking whether a move is legal. The set of the last position
+        asked about is kept in legal_move_set_cache."""
+        key, moves = self.legal_move_set_cache
+        if key != self.zobrist_key:
+            moves = frozenset(self.all_legal_moves)
+            self.legal_move_set_cache = (self.zobrist_key, moves)
+        return moves
 
     @property
     def all_legal_moves(self) -> List[Move]:
         """ Return a list of all legal moves for the current player to make."""
         moves = []
-        for piece in self.color_pieces_flat(self.who):
-            moves.extend(piece.all_legal_moves)
+        for piece_moves in self.legal_moves_by_piece(self.who).values():
+            moves.extend(piece_moves)
         return moves
 
+    def legal_moves_by_piece(self, color: Color) -> Dict[tuple, List[Move]]:
+        """ Return a dict mapping the (row, col) of each color piece to its
+        legal moves. The result is memoized per position in
+        legal_move_cache, which keeps the legal_move_cache_size most
+        recently used positions, and must not be modified."""
+        cache_key = (self.zobrist_key, color)
+        cache = self.legal_move_cache
+        moves = cache.get(cache_key)
+        if moves is not None:
+            cache.move_to_end(cache_key)
+            return moves
+        evasions, pins = self.pins_and_checks(color)
+        moves = {}
+        for piece in self.color_pieces_flat(color):
+            moves[piece.row, piece.col] = piece.legal_moves(evasions, pins)
+        cache[cache_key] = moves
+        if len(cache) > self.legal_move_cache_size:
+            cache.popitem(last=False)
+        return moves
+
+    def perft(self, depth: int, table: dict = None) -> int:
+        """ Return the number of leaf nodes in the tree of legal moves of the
+        given depth. If table is given, it caches the counts of subtrees by
+        (zobrist_key, depth) so that transposed subtrees are counted once."""
+        if depth == 0:
+            return 1
+        if table is not None:
+            count = table.get((self.zobrist_key, depth))
+            if count is not None:
+                return count
+        moves = self.all_legal_moves
+        if depth == 1:
+            count = len(moves)
+        else:
+            count = 0
+            for move in moves:
+                self.push(move)
+                count += self.perft(depth - 1, table)
+                self.pop()
+        if table is not None:
+            table[self.zobrist_key, depth] = count
+        return count
+
+    def divide(self, depth: int, table: dict = None) -> Dict[str, int]:
+        """ Return the perft count of depth - 1 after each legal move."""
+        counts = {}
+        for move in self.all_legal_moves:
+            self.push(move)
+            counts[str(move)] = self.perft(depth - 1, table)
+            self.pop()
+        return counts
+
     @property
     def fen_str(self) -> str:
-        """ The fen string for self."""
-        def letter_from_type(typ) -> str:
-            for k, v in PIECE_TYPES.items():
-                if v == typ:
-                    return k
-            raise Exception(f"Something went wrong. Unknown piece type. {typ}")
-
-        fen_str = ""
-        for row in self.board_rep:
-            empty_sqr_count = 0
-            for piece in row:
-                if piece is not Board.empty:
-                    if empty_sqr_count > 0:
-                        fen_str += str(empty_sqr_count)
-                        empty_sqr_count = 0
-                    letter = letter_from_type(type(piece))
-                    if piece.color == Color.WHITE:
-                        letter = letter.upper()
-                    fen_str += letter
-                else:
-                    empty_sqr_count += 1
-            if empty_sqr_count > 0:
-                fen_str += str(empty_sqr_count)
-            fen_str += "/"  # add a slash at the end of each row
-        fen_str = fen_str[:-1]  # remove the final slash
+        """ The fen string for self. The string is cached in fen_cache, and
+        only the rows changed by push and pop since the last call are written
+        again."""
+        state = (self.zobrist_key, self.half_move_clock, self.full_move_number)
+        if self.fen_cache[0] == state:
+            return self.fen_cache[1]
+        rank_fens = self.rank_fens
+        for row_idx, rank_fen in enumerate(rank_fens):
+            if rank_fen is None:
+                rank_fens[row_idx] = self.rank_fen(row_idx)
+        fen_str = "/".join(rank_fens)
         fen_str += " " + self.who.name[0].lower() + " "
         fen_str += "".join(self.castling_rights)
         fen_str += " " + self.en_passant_target.algebraic
         fen_str += " " + str(self.half_move_clock)
         fen_str += " " + str(self.full_move_number)
+        self.fen_cache = (state, fen_str)
         return fen_str
 
+    def rank_fen(self, row_idx: int) -> str:
+        """ Return the piece placement fen field of a row."""
+        rank_fen = ""
+        empty_sqr_count = 0
+        for piece in self.board_rep[row_idx]:
+            if piece is not Board.empty:
+                if empty_sqr_count > 0:
+                    rank_fen += str(empty_sqr_count)
+                    empty_sqr_count = 0
+                rank_fen += piece.fen_letter
+            else:
+                empty_sqr_count += 1
+        if empty_sqr_count > 0:
+            rank_fen += str(empty_sqr_count)
+        return rank_fen
+
     @property
     def flat_board_rep(self) -> list:
         """ A 64 element list of pieces representing the board."""
@@ -355,9 +847,56 @@ class Board:
 
     @property
     def has_winner(self) -> bool:
-        """ True if there is a winner, False otherwise."""
-        return self.checkmate(self.who) or self.checkmate(Color.other(
-            self.who))
+        """ True if the player to move is checkmated, False otherwise."""
+        return self.status() is Status.CHECKMATE
+
+    def has_legal_move(self, color: Color) -> bool:
+        """ Return True if color has a legal move. Unless the legal moves of
+        the position are already cached, the pieces are tried one at a time
+        and the search stops at the first piece with a legal move."""
+        moves = self.legal_move_cache.get((self.zobrist_key, color))
+        if moves is not None:
+            return any(moves.values())
+        evasions, pins = self.pins_and_checks(color)
+        return any(piece.legal_moves(evasions, pins)
+                   for piece in self.pieces[color])
+
+    def repetitions(self) -> int:
+        """ Return the number of times the current position has occurred.
+        Only the positions since the last capture or pawn move are looked
+        at, as no earlier one can be the same, and of those only the ones
+        with the same player to move."""
+        keys = self.position_keys
+        plies = min(self.half_move_clock, len(keys) - 1)
+        return keys[len(keys) - 1 - plies:][::-2].count(self.zobrist_key)
+
+    def status(self) -> Status:
+        """ Return the Status of the game: CHECKMATE or STALEMATE if the
+        player to move has no legal moves, FIFTY_MOVES once the half move
+        clock reaches 100, REPETITION once the position has occurred three
+        times, and ONGOING otherwise. Whether the player to move has any
+        legal move is cached per position in status_cache."""
+        key = self.zobrist_key
+        cache = self.status_cache
+        status = cache.get(key)
+        if status is None:
+            if self.has_legal_move(self.who):
+                status = Status.ONGOING
+            elif self.check(self.who):
+                status = Status.CHECKMATE
+            else:
+                status = Status.STALEMATE
+            cache[key] = status
+            if len(cache) > self.legal_move_cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        if status is Status.ONGOING:
+            if self.half_move_clock >= 100:
+                return Status.FIFTY_MOVES
+            if self.repetitions() >= 3:
+                return Status.REPETITION
+        return status
 
     def __str__(self) -> str:
         """ Return a human readable string displaying the board."""
@@ -386,11 +925,11 @@ class Board:
             raise IllegalMoveError(
                 "Cannot move outside the boundaries of the board. Please select "
                 + "a different destination.")
-        if self.board_rep[origin.row][origin.col] is Board.empty:
+        if self.get_piece_at(origin) is Board.empty:
             raise IllegalMoveError(
                 "Cannot make a move from an empty square. Please select a valid piece to move."
             )
-        if self.board_rep[origin.row][origin.col].color != self.who:
+        if self.get_piece_at(origin).color != self.who:
             raise IllegalMoveError(
                 f"It is {self.who.name.lower()}'s turn and " +
                 f"{self.who.name.lower()} does not " +
@@ -399,8 +938,13 @@ class Board:
 
 
 class Piece:
-    """ A class for chess pieces."""
-    def __init__(self, location, color, board, symbol):
+    """ A class for chess pieces. Each subclass lists its white and black
+    symbols in symbols, and its fen letter in letter."""
+    __slots__ = ('location', 'color', 'board')
+    symbols = ("", "")
+    letter = ''
+
+    def __init__(self, location, color, board):
         if not location.in_bounds:
             raise Exception(
                 "Invalid position for piece instantiation. Attempted to create"
@@ -408,11 +952,20 @@ class Piece:
         self.location = location
         self.color = color
         self.board = board
-        self.symbol = symbol
 
     def __str__(self):
         return self.symbol
 
+    @property
+    def symbol(self) -> str:
+        """ The unicode symbol of the piece."""
+        return self.symbols[self.color.value]
+
+    @property
+    def fen_letter(self) -> str:
+        """ The letter of the piece in a fen string, upper case for white."""
+        return self.letter.upper() if self.color is Color.WHITE else self.letter
+
     @property
     def row(self) -> int:
         """ Return the row where the piece is located."""
@@ -435,69 +988,88 @@ class Piece:
         global all_legal_moves_count
         all_legal_moves_count += 1
 
+        return list(self.board.legal_moves_by_piece(self.color).get(
+            (self.row, self.col), []))
+
+    def legal_moves(self, evasions: set, pins: dict) -> List[Move]:
+        """ Return a list of the legal moves for this piece, given the
+        evasions and pins of Board.pins_and_checks."""
+        pin_ray = pins.get(self.location.index)
+        if evasions is None and pin_ray is None:
+            return list(self.move_generator())
         moves = []
         for move in self.move_generator():
-            if not self.moving_into_check(move):
+            target = move.target.index
+            if (evasions is None or target in evasions) \
+                    and (pin_ray is None or target in pin_ray):
                 moves.append(move)
         return moves
 
-    def is_legal(self, move: Move) -> None:
-        """ Raise an error if self can not legally move to target."""
-
-        global is_legal_dest_count
-        is_legal_dest_count += 1
-
-        if move not in self.all_legal_moves:
-            raise IllegalMoveError("Move is not legal.")
-
     def moving_into_check(self, move: Move) -> bool:
         """ Return True if self moving to target would result in self being in check."""
-        target = move.target
-        brd = Board(self.board.fen_str)
-        brd.board_rep[target.row][target.col] = brd.board_rep[self.row][
-            self.col]
-        brd.board_rep[self.row][self.col] = Board.empty
-        brd.board_rep[target.row][target.col].location = target
-
-        return brd.check(self.color)
+        self.board.push(move)
+        in_check = self.board.check(self.color)
+        self.board.pop()
+        return in_check
 
     def move_generator(self):
         """ Return a generator which yields target locations not considering whether
         they would be 'moving into check'."""
         raise NotImplementedError
 
+    def slider_move_generator(self, directions: tuple):
+        """ Return a generator which yields the moves along each direction
+        until the edge of the board or a piece is reached."""
+        own_squares = self.board.occupancy[self.color]
+        opp_squares = self.board.occupancy[Color.other(self.color)]
+        origin = self.location
+        for vert_incr, horiz_incr in directions:
+            row, col = self.row + vert_incr, self.col + horiz_incr
+            while 0 <= row <= 7 and 0 <= col <= 7:
+                if own_squares[row][col]:
+                    break
+                if opp_squares[row][col]:
+                    yield Move(origin, SQUARES[row * 8 + col])
+                    break
+                yield Move(origin, SQUARES[row * 8 + col])
+                row, col = row + vert_incr, col + horiz_incr
+
 
 class King(Piece):
     """ King class."""
-    def __init__(self, location, color, board):
-        if color == Color.WHITE:
-            symbol = "\N{white chess king}"
-        else:
-            symbol = "\N{black chess king}"
-        super().__init__(location, color, board, symbol)
+    __slots__ = ()
+    letter = 'k'
+    symbols = ("\N{white chess king}", "\N{black chess king}")
 
     def move_generator(self):
         """ Return a generator which yields target locations not considering whether
         they would be 'moving into check'"""
-        directions = {
-            "up": [-1, 0],
-            "up_right": [-1, 1],
-            "right": [0, 1],
-            "down_right": [1, 1],
-            "down": [1, 0],
-            "down_left": [1, -1],
-            "left": [0, -1],
-            "up_left": [-1, -1]
-        }
-        own_squares = self.board.color_pieces(self.color)
-        for direction in directions.values():
-            target = Location(row_col=(self.row + direction[0],
-                                       self.col + direction[1]))
-            if target.in_bounds:
-                if own_squares[target.row][target.col] == 0:
-                    yield Move(self.location, target)
+        yield from self.step_move_generator()
         yield from self.castle_move_generator()
 
+    def legal_moves(self, evasions: set, pins: dict) -> List[Move]:
+        """ Return a list of the legal moves for the king, which may go to
+        any square that is not attacked once the king has left its own."""
+        moves = list(self.step_move_generator())
+        if evasions is None:
+            moves.extend(self.castle_move_generator())
+        board_rep = self.board.board_rep
+        opp_color = Color.other(self.color)
+        board_rep[self.row][self.col] = Board.empty
+        try:
+            return [move for move in moves
+                    if not self.board.attackers(move.target, opp_color, first_only=True)]
+        finally:
+            board_rep[self.row][self.col] = self
+
+    def step_move_generator(self):
+        """ Return a generator which yields the king's moves except castling."""
+        own_squares = self.board.occupancy[self.color]
+        for vert_incr, horiz_incr in QUEEN_DIRECTIONS:
+            row, col = self.row + vert_incr, self.col + horiz_incr
+            if 0 <= row <= 7 and 0 <= col <= 7 and not own_squares[row][col]:
+                yield Move(self.location, SQUARES[row * 8 + col])
+
     def castle_move_generator(self):
         """ Return a generator which yields castling moves.
         This generator yields moves that are not 'moving through check',
@@ -509,200 +1081,148 @@ class King(Piece):
         else:
             relevant_castling_rights = filter(lambda elem: elem.islower(),
                                               self.board.castling_rights)
-        relevant_castling_rights = map(lambda elem: elem.lower(),
-                                       relevant_castling_rights)
+        relevant_castling_rights = list(map(lambda elem: elem.lower(),
+                                            relevant_castling_rights))
+        if not relevant_castling_rights or self.board.check(self.color):
+            return
+        rank = self.board.board_rep[self.row]
         if "k" in relevant_castling_rights:
-            if all(
-                    self.board.get_piece_at(Location(
-                        algebraic=loc)) is Board.empty
-                    for loc in [f"f{8 - self.row}", f"g{8 - self.row}"]):
-                if not self.moving_into_check(
-                        Move(self.location,
-                             Location(algebraic=f"f{8 - self.row}"))):
-                    yield Move(self.location,
-                               Location(algebraic=f"g{8 - self.row}"))
+            if rank[5] is Board.empty and rank[6] is Board.empty:
+                if not self.board.attackers(SQUARES[self.row * 8 + 5],
+                                            Color.other(self.color), first_only=True):
+                    yield Move(self.location, SQUARES[self.row * 8 + 6])
 
         if "q" in relevant_castling_rights:
-            if all(
-                    self.board.get_piece_at(Location(
-                        algebraic=loc)) is Board.empty for loc in
-                [f"b{8 - self.row}", f"c{8 - self.row}", f"d{8 - self.row}"]):
-                if not self.moving_into_check(
-                        Move(self.location,
-                             Location(algebraic=f"d{8 - self.row}"))):
-                    yield Move(self.location,
-                               Location(algebraic=f"c{8 - self.row}"))
+            if rank[1] is Board.empty and rank[2] is Board.empty \
+                    and rank[3] is Board.empty:
+                if not self.board.attackers(SQUARES[self.row * 8 + 3],
+                                            Color.other(self.color), first_only=True):
+                    yield Move(self.location, SQUARES[self.row * 8 + 2])
 
 
 class Queen(Piece):
     """ Queen class"""
-    def __init__(self, location, color, board):
-        if color == Color.WHITE:
-            symbol = "\N{white chess queen}"
-        else:
-            symbol = "\N{black chess queen}"
-        super().__init__(location, color, board, symbol)
+    __slots__ = ()
+    letter = 'q'
+    symbols = ("\N{white chess queen}", "\N{black chess queen}")
 
     def move_generator(self):
         """ Return a generator which yields target locations not considering whether
         they would be 'moving into check'"""
-        own_squares = self.board.color_pieces(self.color)
-        opp_squares = self.board.color_pieces(Color.other(self.color))
-        directions = {
-            "up": [-1, 0],
-            "up_right": [-1, 1],
-            "right": [0, 1],
-            "down_right": [1, 1],
-            "down": [1, 0],
-            "down_left": [1, -1],
-            "left": [0, -1],
-            "up_left": [-1, -1]
-        }
-        for direction in directions.values():
-            target = Location(row_col=(self.row + direction[0],
-                                       self.col + direction[1]))
-            while target.in_bounds:
-                if own_squares[target.row][target.col]:
-                    break
-                yield Move(self.location, target)
-                if opp_squares[target.row][target.col]:
-                    break
-                target = Location(row_col=(target.row + direction[0],
-                                           target.col + direction[1]))
+        return self.slider_move_generator(QUEEN_DIRECTIONS)
 
 
 class Rook(Piece):
     """ Rook class."""
-    def __init__(self, location, color, board):
-        if color == Color.WHITE:
-            symbol = "\N{white chess rook}"
-        else:
-            symbol = "\N{black chess rook}"
-        super().__init__(location, color, board, symbol)
+    __slots__ = ()
+    letter = 'r'
+    symbols = ("\N{white chess rook}", "\N{black chess rook}")
 
     def move_generator(self):
         """ Return a generator which yields target locations not considering whether
         they would be 'moving into check'"""
-        own_squares = self.board.color_pieces(self.color)
-        opp_squares = self.board.color_pieces(Color.other(self.color))
-        directions = {
-            "up": [-1, 0],
-            "down": [1, 0],
-            "left": [0, -1],
-            "right": [0, 1]
-        }
-        for direction in directions.values():
-            target = Location(row_col=(self.row + direction[0],
-                                       self.col + direction[1]))
-            while target.in_bounds:
-                if own_squares[target.row][target.col]:
-                    break
-                yield Move(self.location, target)
-                if opp_squares[target.row][target.col]:
-                    break
-                target = Location(row_col=(target.row + direction[0],
-                                           target.col + direction[1]))
+        return self.slider_move_generator(ROOK_DIRECTIONS)
 
 
 class Bishop(Piece):
     """ Bishop class."""
-    def __init__(self, location, color, board):
-        if color == Color.WHITE:
-            symbol = "\N{white chess bishop}"
-        else:
-            symbol = "\N{black chess bishop}"
-        super().__init__(location, color, board, symbol)
+    __slots__ = ()
+    letter = 'b'
+    symbols = ("\N{white chess bishop}", "\N{black chess bishop}")
 
     def move_generator(self):
         """ Return a generator which yields target locations not considering whether
         they would be 'moving into check'"""
-        own_squares = self.board.color_pieces(self.color)
-        opp_squares = self.board.color_pieces(Color.other(self.color))
-        for vert_incr in [1, -1]:
-            for horiz_incr in [1, -1]:
-                target = Location(row_col=(self.row + vert_incr,
-                                           self.col + horiz_incr))
-                while target.in_bounds:
-                    if own_squares[target.row][target.col]:
-                        break
-                    yield Move(self.location, target)
-                    if opp_squares[target.row][target.col]:
-                        break
-                    target = Location(row_col=(target.row + vert_incr,
-                                               target.col + horiz_incr))
+        return self.slider_move_generator(BISHOP_DIRECTIONS)
 
 
 class Knight(Piece):
     """ Knight class."""
-    def __init__(self, location, color, board):
-        if color == Color.WHITE:
-            symbol = "\N{white chess knight}"
-        else:
-            symbol = "\N{black chess knight}"
-        super().__init__(location, color, board, symbol)
+    __slots__ = ()
+    letter = 'n'
+    symbols = ("\N{white chess knight}", "\N{black chess knight}")
 
     def move_generator(self):
         """ Return a generator which yields target locations not considering whether
         they would be 'moving into check'"""
-        own_squares = self.board.color_pieces(self.color)
-        for vert_distance in [1, 2]:
-            horiz_distance = vert_distance % 2 + 1
-            for vert_direction in [1, -1]:
-                for horiz_direction in [1, -1]:
-                    target = Location(
-                        row_col=(self.row + vert_distance * vert_direction,
-                                 self.col + horiz_direction * horiz_distance))
-                    if target.in_bounds and not own_squares[target.row][
-                            target.col]:
-                        yield Move(self.location, target)
+        own_squares = self.board.occupancy[self.color]
+        for vert_incr, horiz_incr in KNIGHT_DIRECTIONS:
+            row, col = self.row + vert_incr, self.col + horiz_incr
+            if 0 <= row <= 7 and 0 <= col <= 7 and not own_squares[row][col]:
+                yield Move(self.location, SQUARES[row * 8 + col])
 
 
 class Pawn(Piece):
     """ Pawn class."""
-    def __init__(self, location: Location, color: Color, board):
-        if color == Color.WHITE:
-            symbol = "\N{white chess pawn}"
-            self.starting_row = 6  # in 8x8 matrix coords
-            self.forward = -1
-            self.last_row = 0  # in 8x8 matrix coords
-        else:
-            symbol = "\N{black chess pawn}"
-            self.starting_row = 1  # in 8x8 matrix coords
-            self.forward = 1
-            self.last_row = 7  # in 8x8 matrix coords
-        super().__init__(location, color, board, symbol)
+    __slots__ = ()
+    letter = 'p'
+    symbols = ("\N{white chess pawn}", "\N{black chess pawn}")
+    # indexed by color value, rows are in 8x8 matrix coords
+    starting_rows = (6, 1)
+    forwards = (-1, 1)
+    last_rows = (0, 7)
+
+    @property
+    def starting_row(self) -> int:
+        """ The row the pawn starts on, from which it may move two squares."""
+        return self.starting_rows[self.color.value]
+
+    @property
+    def forward(self) -> int:
+        """ The direction the pawn moves in, -1 for white and 1 for black."""
+        return self.forwards[self.color.value]
+
+    @property
+    def last_row(self) -> int:
+        """ The row where the pawn is promoted."""
+        return self.last_rows[self.color.value]
 
     def move_generator(self):
         """ Return a generator which yields target locations not considering whether
         they would be 'moving into check'"""
-        opp_squares = self.board.color_pieces(Color.other(self.color))
+        board_rep = self.board.board_rep
+        opp_squares = self.board.occupancy[Color.other(self.color)]
         en_passant_target = self.board.en_passant_target
-        if en_passant_target.in_bounds:
-            opp_squares[en_passant_target.row][en_passant_target.col] = 1
-
-        one_sqr_fwd = Location(row_col=(self.row + self.forward, self.col))
-        if one_sqr_fwd.in_bounds \
-                and self.board.board_rep[one_sqr_fwd.row][one_sqr_fwd.col] is Board.empty:
-            yield from self.promotion_move_generator(one_sqr_fwd)
-
-        two_sqr_fwd = Location(row_col=(self.row + 2 * self.forward, self.col))
-        if self.row == self.starting_row \
-                and self.board.board_rep[one_sqr_fwd.row][one_sqr_fwd.col] is Board.empty \
-                and self.board.board_rep[two_sqr_fwd.row][two_sqr_fwd.col] is Board.empty:
-            yield Move(
-                self.location,
-                Location(row_col=(self.row + 2 * self.forward, self.col)))
-
-        attack_right = Location(row_col=(self.row + self.forward,
-                                         self.col + 1))
-        if attack_right.in_bounds \
-                and opp_squares[attack_right.row][attack_right.col]:
-            yield from self.promotion_move_generator(attack_right)
-
-        attack_left = Location(row_col=(self.row + self.forward, self.col - 1))
-        if attack_left.in_bounds and opp_squares[attack_left.row][
-                attack_left.col]:
-            yield from self.promotion_move_generator(attack_left)
+        forward = self.forwards[self.color.value]
+        row = self.row + forward
+        if not 0 <= row <= 7:
+            return
+
+        if board_rep[row][self.col] is Board.empty:
+            yield from self.promotion_move_generator(SQUARES[row * 8 + self.col])
+            if self.row == self.starting_rows[self.color.value] \
+                    and board_rep[row + forward][self.col] is Board.empty:
+                yield Move(self.location,
+                           SQUARES[(row + forward) * 8 + self.col])
+
+        for col in (self.col + 1, self.col - 1):
+            if 0 <= col <= 7:
+                target = SQUARES[row * 8 + col]
+                if opp_squares[row][col]:
+                    yield from self.promotion_move_generator(target)
+                elif target is en_passant_target:
+                    yield Move(self.location, target)
+
+    def legal_moves(self, evasions: set, pins: dict) -> List[Move]:
+        """ Return a list of the legal moves for this pawn. An en passant
+        capture removes two pieces from the board, so it is checked by
+        making the move."""
+        en_passant_target = self.board.en_passant_target
+        if not en_passant_target.in_bounds \
+                or en_passant_target.row != self.row + self.forward \
+                or abs(en_passant_target.col - self.col) != 1:
+            return super().legal_moves(evasions, pins)
+        pin_ray = pins.get(self.location.index)
+        moves = []
+        for move in self.move_generator():
+            target = move.target.index
+            if move.target is en_passant_target:
+                if not self.moving_into_check(move):
+                    moves.append(move)
+            elif (evasions is None or target in evasions) \
+                    and (pin_ray is None or target in pin_ray):
+                moves.append(move)
+        return moves
 
     def promotion_move_generator(self, target: Location) -> tuple:
         """ Return a generator which yields the moves where the pawn is
@@ -725,6 +1245,80 @@ PIECE_TYPES = {
     "p": Pawn
 }
 
+QUEEN_DIRECTIONS = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+ROOK_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+KNIGHT_DIRECTIONS = ((1, 2), (1, -2), (-1, 2), (-1, -2), (2, 1), (2, -1), (-2, 1), (-2, -1))
+SLIDER_DIRECTIONS = [((-1, 0), (Rook, Queen)), ((1, 0), (Rook, Queen)),
+                     ((0, -1), (Rook, Queen)), ((0, 1), (Rook, Queen)),
+                     ((-1, -1), (Bishop, Queen)), ((-1, 1), (Bishop, Queen)),
+                     ((1, -1), (Bishop, Queen)), ((1, 1), (Bishop, Queen))]
+
+# Piece-square tables in centipawns, from white's point of view and indexed
+# like SQUARES, so a8 comes first. Black uses the table mirrored vertically.
+PIECE_SQUARE_TABLES = {
+    'p': [0, 0, 0, 0, 0, 0, 0, 0,
+          50, 50, 50, 50, 50, 50, 50, 50,
+          10, 10, 20, 30, 30, 20, 10, 10,
+          5, 5, 10, 25, 25, 10, 5, 5,
+          0, 0, 0, 20, 20, 0, 0, 0,
+          5, -5, -10, 0, 0, -10, -5, 5,
+          5, 10, 10, -20, -20, 10, 10, 5,
+          0, 0, 0, 0, 0, 0, 0, 0],
+    'n': [-50, -40, -30, -30, -30, -30, -40, -50,
+          -40, -20, 0, 0, 0, 0, -20, -40,
+          -30, 0, 10, 15, 15, 10, 0, -30,
+          -30, 5, 15, 20, 20, 15, 5, -30,
+          -30, 0, 15, 20, 20, 15, 0, -30,
+          -30, 5, 10, 15, 15, 10, 5, -30,
+          -40, -20, 0, 5, 5, 0, -20, -40,
+          -50, -40, -30, -30, -30, -30, -40, -50],
+    'b': [-20, -10, -10, -10, -10, -10, -10, -20,
+          -10, 0, 0, 0, 0, 0, 0, -10,
+          -10, 0, 5, 10, 10, 5, 0, -10,
+          -10, 5, 5, 10, 10, 5, 5, -10,
+          -10, 0, 10, 10, 10, 10, 0, -10,
+          -10, 10, 10, 10, 10, 10, 10, -10,
+          -10, 5, 0, 0, 0, 0, 5, -10,
+          -20, -10, -10, -10, -10, -10, -10, -20],
+    'r': [0, 0, 0, 0, 0, 0, 0, 0,
+          5, 10, 10, 10, 10, 10, 10, 5,
+          -5, 0, 0, 0, 0, 0, 0, -5,
+          -5, 0, 0, 0, 0, 0, 0, -5,
+          -5, 0, 0, 0, 0, 0, 0, -5,
+          -5, 0, 0, 0, 0, 0, 0, -5,
+          -5, 0, 0, 0, 0, 0, 0, -5,
+          0, 0, 0, 5, 5, 0, 0, 0],
+    'q': [-20, -10, -10, -5, -5, -10, -10, -20,
+          -10, 0, 0, 0, 0, 0, 0, -10,
+          -10, 0, 5, 5, 5, 5, 0, -10,
+          -5, 0, 5, 5, 5, 5, 0, -5,
+          0, 0, 5, 5, 5, 5, 0, -5,
+          -10, 5, 5, 5, 5, 5, 0, -10,
+          -10, 0, 5, 0, 0, 0, 0, -10,
+          -20, -10, -10, -5, -5, -10, -10, -20],
+    'k': [-30, -40, -40, -50, -50, -40, -40, -30,
+          -30, -40, -40, -50, -50, -40, -40, -30,
+          -30, -40, -40, -50, -50, -40, -40, -30,
+          -30, -40, -40, -50, -50, -40, -40, -30,
+          -20, -30, -30, -40, -40, -30, -30, -20,
+          -10, -20, -20, -20, -20, -20, -20, -10,
+          20, 20, 0, 0, 0, 0, 20, 20,
+          20, 30, 10, 0, 0, 10, 30, 20],
+}
+
+_zobrist_random = random.Random(2020)
+ZOBRIST_PIECE_KEYS = {(typ, color): [_zobrist_random.getrandbits(64) for _ in range(64)]
+                      for typ in PIECE_TYPES.values() for color in Color}
+ZOBRIST_BLACK_KEY = _zobrist_random.getrandbits(64)
+ZOBRIST_CASTLING_KEYS = {right: _zobrist_random.getrandbits(64) for right in "KQkq"}
+ZOBRIST_EN_PASSANT_KEYS = [_zobrist_random.getrandbits(64) for _ in range(8)]
+
+
+def zobrist_piece_key(piece, location: Location) -> int:
+    """ Return the zobrist key for piece standing on location."""
+    return ZOBRIST_PIECE_KEYS[type(piece), piece.color][location.row * 8 + location.col]
+
 
 class IllegalMoveError(Exception):
     """ An error that is raised when illegal moves are attempted."""
@@ -745,16 +1339,20 @@ def clear_screen():
     print('\n\n\n\n')
 
 
-def play(p_0, p_1, print_visuals=True):
-    """ Play a game of chess."""
+def play(p_0, p_1, print_visuals=True, board=None):
+    """ Play a game of chess. board defaults to a Board in the initial setup,
+    but any board with the same interface, e.g. bitboard.BitBoard, can be given.
+    The moves of players with a true trusted attribute are made without being
+    checked.
+    """
     def next_player():
         if cur_player == p_0:
             return p_1
         return p_0
 
     cur_player = p_0
-    board = Board()
-    history = [board.fen_str]
+    if board is None:
+        board = Board()
     game_over = False
     while not game_over:
 
@@ -766,25 +1364,19 @@ def play(p_0, p_1, print_visuals=True):
             #
             #  if input("Enter 'u' to undo the last move, or nothing to skip: "
             #           ) == 'u':
-            #      if history:
-            #          board = Board(history.pop())
+            #      if board.undo_stack:
+            #          board.pop()
             #      clear_screen()
             #      continue
 
-            if not history or (history[-1] != board.fen_str):
-                history.append(board.fen_str)
-
         move = cur_player.move(board)
         try:
-            board.make_move(move)
+            board.make_move(move, getattr(cur_player, 'trusted', False))
             cur_player = next_player()
-            if board.has_winner or not any(
-                    piece.all_legal_moves for piece in board.color_pieces_flat(
-                        board.who)) or board.half_move_clock >= 100:
+            if board.status() is not Status.ONGOING:
                 game_over = True
             if print_visuals:
                 clear_screen()
-            history.append(board.fen_str)
         except IllegalMoveError as exp:
             if print_visuals:
                 clear_screen()
@@ -799,10 +1391,8 @@ def play(p_0, p_1, print_visuals=True):
                 f'{exp}\n{board.fen_str}'
             )  # TODO raise from ?? idk pylint is telling me i should use raise from, look this up when get into wifi
 
-    if board.checkmate(Color.WHITE):
-        winner = 'b'
-    elif board.checkmate(Color.BLACK):
-        winner = 'w'
+    if board.status() is Status.CHECKMATE:
+        winner = 'b' if board.who is Color.WHITE else 'w'
     else:
         winner = '-'
     if print_visuals:
@@ -815,7 +1405,6 @@ def play(p_0, p_1, print_visuals=True):
             print("Draw.")
         print('all_legal_moves_count:', all_legal_moves_count)
         print('checkmatecount:', checkmatecount)
-        print('is_legal_dest_count:', is_legal_dest_count)
         print(board.fen_str)
 
     return winner
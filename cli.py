@@ -2,12 +2,13 @@
 """ Main driver for a chess game."""
 
 from chess import play
-from players import HumanPlayer, RandomPlayer, MiniMax
+from players import HumanPlayer, RandomPlayer, MiniMax, AlphaBeta
 
 players = {
     'h': HumanPlayer,
     'r': RandomPlayer,
-    'm': MiniMax
+    'm': MiniMax,
+    'a': AlphaBeta
 }
 
 
@@ -23,11 +24,13 @@ def main():
 
         while not p_0:
             p_0_input = input("Select the white player. Enter 'h' to play as a " \
-                              + "human, 'r' to have random moves be played, or 'm' to have the computer use a minimax strategy..\n")
+                              + "human, 'r' to have random moves be played, 'm' to have the computer use a minimax strategy, " \
+                              + "or 'a' to have the computer use an alpha-beta strategy.\n")
             p_0 = players.get(p_0_input, None)
         while not p_1:
             p_1_input = input("Select the white player. Enter 'h' to play as a " \
-                              + "human, 'r' to have random moves be played, or 'm' to have the computer use a minimax strategy..\n")
+                              + "human, 'r' to have random moves be played, 'm' to have the computer use a minimax strategy, " \
+                              + "or 'a' to have the computer use an alpha-beta strategy.\n")
             p_1 = players.get(p_1_input, None)
 
 
@@ -39,6 +42,8 @@ def main():
             p_0 = p_0(print_visuals)
         elif p_0 is MiniMax:
             p_0 = p_0(0, print_visuals)
+        elif p_0 is AlphaBeta:
+            p_0 = p_0(print_visuals=print_visuals)
         else:
             p_0 = p_0()
 
@@ -46,6 +51,8 @@ def main():
             p_1 = p_1(print_visuals)
         elif p_1 is MiniMax:
             p_1 = p_1(0, print_visuals)
+        elif p_1 is AlphaBeta:
+            p_1 = p_1(print_visuals=print_visuals)
         else:
             p_1 = p_1()
 
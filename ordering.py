@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+""" Move ordering for the search players.
+
+Alpha-beta search prunes the most when the best move is searched first. The
+moves of a node are searched in this order:
+    - the move stored in the transposition table
+    - captures and promotions, most valuable victim first, then least
+      valuable attacker first
+    - the killer moves of the ply, quiet moves that caused a cutoff in a
+      sibling node
+    - the remaining quiet moves, by their history score
+"""
+
+from typing import List
+
+from chess import Color, Move, Board, Pawn, Knight, Bishop, Rook, Queen, King, PIECE_TYPES
+
+PIECE_ORDER = {Pawn: 1, Knight: 2, Bishop: 3, Rook: 4, Queen: 5, King: 6}
+
+HASH_MOVE, CAPTURE, KILLER, QUIET = 3, 2, 1, 0
+
+
+class MoveOrderer:
+    """ Sort moves for a search, keeping killer moves per ply and a history
+    score per (color, origin, target) that are learnt from beta cutoffs.
+    """
+    def __init__(self, killers_per_ply=2):
+        self.killers_per_ply = killers_per_ply
+        self.killers = []
+        self.history = [0] * (2 * 64 * 64)
+
+    def new_search(self) -> None:
+        """ Forget the killer moves and age the history scores."""
+        self.killers = []
+        self.history = [score // 2 for score in self.history]
+
+    @classmethod
+    def victim_type(cls, board: Board, move: Move):
+        """ Return the type of the piece captured by move, or None."""
+        victim = board.get_piece_at(move.target)
+        if victim is not Board.empty:
+            return type(victim)
+        if move.target == board.en_passant_target \
+                and isinstance(board.get_piece_at(move.origin), Pawn):
+            return Pawn
+        return None
+
+    @classmethod
+    def is_quiet(cls, board: Board, move: Move) -> bool:
+        """ Return True if move is neither a capture nor a promotion."""
+        return move.promotion is None and cls.victim_type(board, move) is None
+
+    @classmethod
+    def capture_value(cls, board: Board, move: Move):
+        """ Return the MVV-LVA value of a capture or promotion, or None if
+        move is quiet."""
+        victim = cls.victim_type(board, move)
+        if victim is None and move.promotion is None:
+            return None
+        attacker = type(board.get_piece_at(move.origin))
+        value = 10 * PIECE_ORDER.get(victim, 0) - PIECE_ORDER[attacker]
+        if move.promotion is not None:
+            value += 10 * PIECE_ORDER[PIECE_TYPES[move.promotion]]
+        return value
+
+    @classmethod
+    def order_captures(cls, board: Board, moves: List[Move]) -> List[Move]:
+        """ Return the captures and promotions among moves, by MVV-LVA."""
+        scored = [(cls.capture_value(board, move), move) for move in moves]
+        scored = [(value, move) for value, move in scored if value is not None]
+        scored.sort(key=lambda value_move: value_move[0], reverse=True)
+        return [move for _, move in scored]
+
+    def score(self, board: Board, move: Move, hash_move: Move, ply: int) -> tuple:
+        """ Return a sort key for move, larger keys are searched first."""
+        if hash_move is not None and move == hash_move:
+            return (HASH_MOVE, 0)
+        value = self.capture_value(board, move)
+        if value is not None:
+            return (CAPTURE, value)
+        if ply < len(self.killers) and move in self.killers[ply]:
+            return (KILLER, -self.killers[ply].index(move))
+        return (QUIET, self.history[self.history_index(board.who, move)])
+
+    def order(self, board: Board, moves: List[Move], hash_move: Move = None,
+              ply: int = 0) -> List[Move]:
+        """ Return moves sorted in the order they should be searched."""
+        return sorted(moves,
+                      key=lambda move: self.score(board, move, hash_move, ply),
+                      reverse=True)
+
+    def record_cutoff(self, color: Color, move: Move, depth: int, ply: int) -> None:
+        """ Remember a quiet move that caused a beta cutoff at ply."""
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self.killers_per_ply:]
+        self.history[self.history_index(color, move)] += depth * depth
+
+    @classmethod
+    def history_index(cls, color: Color, move: Move) -> int:
+        """ Return the index of move in the history table."""
+        return color.value * 4096 + move.origin.index * 64 + move.target.index
@@ -1,15 +1,31 @@
 #!/usr/bin/env python3
 """ Some chess players.
 TODO:
-    -implement an Alpha-Beta algorithm to play chess
-        -implement a simple position evaluation function
+    -implement a better position evaluation function
         -implement an RL based evaluation function
 """
 
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from chess import Color, Location, Move, Board
-from typing import Tuple
+from transposition import (TranspositionTable, SharedTranspositionTable,
+                           EXACT, LOWER_BOUND, UPPER_BOUND)
+from ordering import MoveOrderer
+from batch import plane_indices, stack
+from typing import List, Tuple
+
+MATE_SCORE = 10000
+
+PIECE_SCORES = {
+    'r': 4,
+    'n': 3,
+    'b': 4,
+    'q': 7,
+    'k': 0,
+    'p': 1,
+}
 
 
 class HumanPlayer:
@@ -40,16 +56,15 @@ class HumanPlayer:
 
 class RandomPlayer:
     """ A class that makes a random legal move."""
+    # moves are taken from board.all_legal_moves, so play need not check them
+    trusted = True
+
     def __init__(self, print_visuals=False):
         self.print_visuals = print_visuals
 
     def move(self, board: Board) -> Move:
         """ Return a random move."""
-        pieces = board.color_pieces_flat(board.who)
-        moves = []
-        for piece in pieces:
-            moves.extend(piece.all_legal_moves)
-        move = random.choice(moves)
+        move = random.choice(board.all_legal_moves)
         if self.print_visuals:
             print(move.origin.algebraic, move.target.algebraic)
             #  input('Press return to continue.')
@@ -59,92 +74,455 @@ class RandomPlayer:
 class MiniMax:
     """ A class that implements a mini-max search algorighm.
     Note, self.depth must be an even integer for the player to play correctly.
+    Search results are kept in a transposition table of hash_mb megabytes,
+    which is shared by every move of a game. Pass hash_mb=0 to disable it.
+    Leaves are scored by a quiescence search unless quiescence is False.
+    Positions are scored by evaluate, with the pieces valued by piece_scores.
+    If batch_evaluator is given, e.g. a batch.BatchEvaluator, leaves are
+    not searched with quiescence; instead the children of each frontier node
+    are encoded as piece planes and scored together in one
+    batch_evaluator.evaluate(planes, color) call.
+    With workers > 0, the root moves are split between that many worker
+    processes, which are started on the first move and kept for the rest of
+    the game; call close() to shut them down. The transposition table is
+    then a SharedTranspositionTable that every worker probes and stores
+    into, made on the first move and freed by close().
+    The score of a node is not stored when a repetition was scored as a draw
+    below it, as that score depends on the path taken to the node.
     """
-    def __init__(self, depth=0, print_visuals=False):
+    trusted = True
+
+    def __init__(self, depth=0, print_visuals=False, hash_mb=16,
+                 quiescence=True, piece_scores=PIECE_SCORES,
+                 batch_evaluator=None, workers=0):
         self.depth = depth
+        self.workers = workers
+        self.hash_mb = hash_mb
+        self.executor = None
+        self.piece_scores = piece_scores
         self.color = None
         self.counter = 0
+        self.nodes = 0
+        self.repetition_draws = 0
         self.print_visuals = print_visuals
+        if hash_mb and not workers:
+            self.table = TranspositionTable(hash_mb)
+        else:
+            # a shared table is only made once a move is searched
+            self.table = None
+        self.quiescence = quiescence
+        self.batch_evaluator = batch_evaluator
 
     def move_helper(self, board, depth: int = None):
-        """ Take in a board and a depth. Return the (board, score) tuple that
-        contains the board with the most extreme score, either maximized or
-        minimized depending on the depth paramater.
+        """ Take in a board and a depth. Return the (move, score) tuple that
+        contains the move with the most extreme score, either maximized or
+        minimized depending on the depth paramater. Moves are searched in
+        place with board.push and board.pop, so board is left unchanged.
         """
         try:
-            if board.has_winner:
-                if board.checkmate(self.color):
-                    return ('we lost', -10000)
-                return ('we won', 10000)
-
             if depth is None:
                 depth = self.depth
-            fen = board.fen_str
-            possible_boards = [(move, Board(fen))
-                               for move in board.all_legal_moves]
-            for move, board in possible_boards:
-                board.make_move(move)
+            # scores are stored from the point of view of the player to move
+            sign = 1 if board.who is self.color else -1
+            if self.table is not None:
+                entry = self.table.probe(board.zobrist_key)
+                if entry is not None and entry[0] >= depth:
+                    _, score, _, move = entry
+                    return (move, sign * score)
 
-            if not possible_boards:
-                return ('stalement', 0)
+            moves = board.all_legal_moves
 
-            if depth == 0:
-                scored_boards = [(move, self.simple_evaluator(board))
-                                 for move, board in possible_boards]
-            else:
-                scored_boards = [(move, self.move_helper(board, depth - 1)[1])
-                                 for move, board in possible_boards]
-
-            np.random.shuffle(scored_boards)
-            #  if depth == self.depth:
-            #      for b in scored_boards:
-            #          print(b)
+            if not moves:
+                if board.check(board.who):
+                    if board.who is self.color:
+                        return ('we lost', -10000)
+                    return ('we won', 10000)
+                return ('stalement', 0)
 
-            if depth % 2 == self.depth % 2:
-                return max(scored_boards, key=lambda ms: ms[1])
+            draws = self.repetition_draws
+            if depth == 0 and self.batch_evaluator is not None:
+                scored_boards = self.batch_evaluate(board, moves)
             else:
-                return min(scored_boards, key=lambda ms: ms[1])
+                scored_boards = []
+                for move in moves:
+                    board.push(move)
+                    scored_boards.append((move, self.child_score(board, depth)))
+                    board.pop()
+            return self.best_of(board, scored_boards, depth,
+                                store=self.repetition_draws == draws)
         except ValueError as e:
             print(scored_boards)
             print(board)
             raise e
 
+    def child_score(self, board, depth: int) -> int:
+        """ Return the score of board, reached by a move from a node that is
+        depth plies from the frontier. A position that repeats an earlier one
+        is scored as a draw and not searched."""
+        if board.repetitions() > 1:
+            self.repetition_draws += 1
+            return 0
+        if depth == 0 and self.quiescence:
+            score = quiescence(board, -MATE_SCORE, MATE_SCORE,
+                               self.quiescence_evaluator)
+            if board.who is not self.color:
+                score = -score
+            return score
+        if depth == 0:
+            return self.simple_evaluator(board)
+        return self.move_helper(board, depth - 1)[1]
+
+    def best_of(self, board, scored_boards: List[Tuple[Move, int]],
+                depth: int, store: bool = True) -> Tuple[Move, int]:
+        """ Return the best of the (move, score) pairs of the node board at
+        depth, breaking ties at random, and store it in the table unless
+        store is False."""
+        np.random.shuffle(scored_boards)
+        #  if depth == self.depth:
+        #      for b in scored_boards:
+        #          print(b)
+
+        if depth % 2 == self.depth % 2:
+            best = max(scored_boards, key=lambda ms: ms[1])
+        else:
+            best = min(scored_boards, key=lambda ms: ms[1])
+        if self.table is not None and store:
+            sign = 1 if board.who is self.color else -1
+            self.table.store(board.zobrist_key, depth, sign * best[1],
+                             EXACT, best[0])
+        return best
+
+    def parallel_move_helper(self, board) -> Tuple[Move, int]:
+        """ Return the best (move, score) of board like move_helper, with the
+        root moves split between the worker processes."""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers)
+        moves = board.all_legal_moves
+        table_name = self.table.name if self.table is not None else None
+        settings = (type(board), self.depth, table_name, self.quiescence,
+                    tuple(self.piece_scores.items()))
+        chunks = [moves[i::self.workers] for i in range(self.workers)]
+        # the positions a repetition could go back to
+        keys = board.position_keys[-1 - board.half_move_clock:]
+        position = (board.fen_str, board.square_values, keys)
+        futures = [self.executor.submit(_score_root_moves, position,
+                                        [move.code for move in chunk], settings,
+                                        self.batch_evaluator)
+                   for chunk in chunks if chunk]
+        scores = {}
+        draws = 0
+        for chunk, future in zip(chunks, futures):
+            chunk_scores, nodes, chunk_draws = future.result()
+            scores.update(zip(chunk, chunk_scores))
+            self.counter += nodes
+            draws += chunk_draws
+        self.repetition_draws += draws
+        return self.best_of(board, [(move, scores[move]) for move in moves],
+                            self.depth, store=draws == 0)
+
+    def close(self) -> None:
+        """ Shut down the worker processes, if any were started, and free
+        the shared transposition table."""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if isinstance(self.table, SharedTranspositionTable):
+            self.table.close()
+            self.table.unlink()
+            self.table = None
+
     def move(self, board: Board) -> Move:
         self.color = board.who
-        move, score = self.move_helper(board)
+        if self.workers and self.hash_mb and self.table is None:
+            self.table = SharedTranspositionTable(self.hash_mb)
+        if self.table is not None:
+            self.table.new_search()
+        if self.workers and self.depth > 0 and board.all_legal_moves:
+            move, score = self.parallel_move_helper(board)
+        else:
+            move, score = self.move_helper(board)
         if self.print_visuals:
             print(self.counter)
             print(move, score)
+        self.nodes = self.counter
         self.counter = 0
         #  input(move)
         return move
 
+    def batch_evaluate(self, board: Board, moves: List[Move]) -> List[Tuple[Move, int]]:
+        """ Return a (move, score) pair for each move, scoring the positions
+        after the moves for self.color in a single batch."""
+        indices, repeated = [], []
+        for move in moves:
+            board.push(move)
+            indices.append(plane_indices(board))
+            repeated.append(board.repetitions() > 1)
+            board.pop()
+        self.counter += len(moves)
+        self.repetition_draws += sum(repeated)
+        scores = self.batch_evaluator.evaluate(stack(indices), self.color)
+        return [(move, 0 if draw else score)
+                for move, score, draw in zip(moves, scores.tolist(), repeated)]
+
     def simple_evaluator(self, board: Board):
         self.counter += 1
-        piece_scores = {
-            'r': 4,
-            'n': 3,
-            'b': 4,
-            'q': 7,
-            'k': 0,
-            'p': 1,
-        }
         #  if board.has_winner:
         #      if board.checkmate(self.color):
         #          return -10000
         #      return 10000
+        return evaluate(board, self.color, self.piece_scores)
+
+    def quiescence_evaluator(self, board: Board):
+        """ Return the score of board for the player to move."""
+        self.counter += 1
+        return evaluate(board, board.who, self.piece_scores)
+
+
+_worker_players = {}
 
-        fen = board.fen_str.split()[0]
-        pieces = [e for e in list(fen) if e.lower().islower()]
 
-        white_pieces = [piece for piece in pieces if piece.isupper()]
-        black_pieces = [piece for piece in pieces if piece.islower()]
+def _score_root_moves(position: tuple, codes: List[int], settings: tuple,
+                      batch_evaluator=None) -> Tuple[List[int], int, int]:
+    """ Search the root moves given by their codes in a worker process of
+    MiniMax.parallel_move_helper, from the position given by its (fen,
+    square_values, position_keys), and return their scores, the number of
+    nodes searched and the number of repetitions scored as draws. The player
+    is kept between calls, so the shared transposition table is only opened
+    once per game."""
+    board_type, depth, table_name, quiescence_, piece_scores = settings
+    player = _worker_players.get(settings)
+    if player is None:
+        player = MiniMax(depth, hash_mb=0, quiescence=quiescence_,
+                         piece_scores=dict(piece_scores))
+        if table_name is not None:
+            player.table = SharedTranspositionTable(name=table_name)
+        _worker_players[settings] = player
+    fen, square_values, keys = position
+    board = board_type(fen, square_values)
+    board.position_keys = list(keys)
+    player.batch_evaluator = batch_evaluator
+    player.color = board.who
+    player.counter = 0
+    player.repetition_draws = 0
+    scores = []
+    for code in codes:
+        board.push(Move.from_code(code))
+        scores.append(player.child_score(board, depth))
+        board.pop()
+    return scores, player.counter, player.repetition_draws
 
-        white_score = sum(piece_scores[piece.lower()]
-                          for piece in white_pieces)
-        black_score = sum(piece_scores[piece] for piece in black_pieces)
 
-        if self.color == Color.WHITE:
-            return white_score - black_score
+class SearchAborted(Exception):
+    """ An error that is raised inside a search when it runs out of time or
+    is asked to stop."""
+
+
+class AlphaBeta:
+    """ A class that implements a negamax search with alpha-beta pruning,
+    driven by iterative deepening.
+    The search is repeated one ply deeper at a time until max_depth is reached
+    or time_limit seconds have passed, and the best move of the deepest
+    completed search is played. Moves are ordered by ordering.MoveOrderer.
+    stop() may be called from another thread to end the search early, in
+    which case the best move found so far is played.
+    Positions are scored by evaluate, with the pieces valued by piece_scores.
+    """
+    mate_score = MATE_SCORE
+    trusted = True
+
+    def __init__(self, max_depth=4, time_limit=5.0, print_visuals=False,
+                 hash_mb=16, piece_scores=PIECE_SCORES):
+        self.max_depth = max_depth
+        self.piece_scores = piece_scores
+        self.time_limit = time_limit
+        self.print_visuals = print_visuals
+        self.table = TranspositionTable(hash_mb)
+        self.orderer = MoveOrderer()
+        self.best_move = None
+        self.nodes = 0
+        self.repetition_draws = 0
+        self.deadline = None
+        self.stop_requested = False
+
+    def stop(self) -> None:
+        """ Ask the search to stop and play the best move found so far."""
+        self.stop_requested = True
+
+    def move(self, board: Board) -> Move:
+        """ Return the best move found by iterative deepening."""
+        self.table.new_search()
+        self.orderer.new_search()
+        self.nodes = 0
+        self.stop_requested = False
+        self.best_move = board.all_legal_moves[0]
+        if self.time_limit is not None:
+            self.deadline = time.time() + self.time_limit
+        root_ply = len(board.undo_stack)
+        try:
+            for depth in range(1, self.max_depth + 1):
+                self.best_move, score = self.search_root(board, depth)
+                if self.print_visuals:
+                    print(f'depth {depth}: {self.best_move} {score} '
+                          f'({self.nodes} nodes)')
+        except SearchAborted:
+            while len(board.undo_stack) > root_ply:
+                board.pop()
+        return self.best_move
+
+    def search_root(self, board: Board, depth: int) -> Tuple[Move, int]:
+        """ Return the best (move, score) for the player to move, searching
+        depth plies."""
+        moves = self.order_moves(board, board.all_legal_moves)
+        alpha, beta = -self.mate_score - 1, self.mate_score + 1
+        best_move = moves[0]
+        draws = self.repetition_draws
+        for move in moves:
+            board.push(move)
+            score = -self.negamax(board, depth - 1, -beta, -alpha, 1)
+            board.pop()
+            if score > alpha:
+                alpha, best_move = score, move
+        if self.repetition_draws == draws:
+            self.table.store(board.zobrist_key, depth, alpha, EXACT, best_move)
+        return best_move, alpha
+
+    def negamax(self, board: Board, depth: int, alpha: int, beta: int,
+                ply: int) -> int:
+        """ Return the score of board for the player to move, searching depth
+        plies. Scores outside of the (alpha, beta) window are only bounds.
+        A position that repeats an earlier one is scored as a draw, and the
+        scores of the nodes above it are not stored in the table, as they
+        depend on the path taken to them."""
+        if board.repetitions() > 1:
+            self.repetition_draws += 1
+            return 0
+        if depth == 0:
+            return quiescence(board, alpha, beta, self.evaluate, ply)
+        self.visit()
+
+        entry = self.table.probe(board.zobrist_key)
+        if entry is not None:
+            entry_depth, score, bound, _ = entry
+            score = self.score_from_table(score, ply)
+            if entry_depth >= depth and (
+                    bound == EXACT or (bound == LOWER_BOUND and score >= beta)
+                    or (bound == UPPER_BOUND and score <= alpha)):
+                return score
+
+        moves = board.all_legal_moves
+        if not moves:
+            if board.check(board.who):
+                return -self.mate_score + ply
+            return 0
+
+        alpha_orig = alpha
+        draws = self.repetition_draws
+        best_score, best_move = -self.mate_score - 1, None
+        for move in self.order_moves(board, moves, ply):
+            board.push(move)
+            score = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+            if score > best_score:
+                best_score, best_move = score, move
+                alpha = max(alpha, score)
+                if alpha >= beta:
+                    if self.orderer.is_quiet(board, move):
+                        self.orderer.record_cutoff(board.who, move, depth,
+                                                   ply)
+                    break
+
+        if best_score <= alpha_orig:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
         else:
-            return black_score - white_score
+            bound = EXACT
+        if self.repetition_draws == draws:
+            self.table.store(board.zobrist_key, depth,
+                             self.score_to_table(best_score, ply), bound,
+                             best_move)
+        return best_score
+
+    def order_moves(self, board: Board, moves: List[Move],
+                    ply: int = 0) -> List[Move]:
+        """ Return moves in the order they should be searched, starting with
+        the move stored in the transposition table."""
+        entry = self.table.probe(board.zobrist_key)
+        hash_move = entry[3] if entry is not None else None
+        return self.orderer.order(board, moves, hash_move, ply)
+
+    def score_to_table(self, score: int, ply: int) -> int:
+        """ Make mate scores relative to the node being stored."""
+        if score > self.mate_score - 1000:
+            return score + ply
+        if score < -self.mate_score + 1000:
+            return score - ply
+        return score
+
+    def score_from_table(self, score: int, ply: int) -> int:
+        """ Make mate scores read from the table relative to the root."""
+        if score > self.mate_score - 1000:
+            return score - ply
+        if score < -self.mate_score + 1000:
+            return score + ply
+        return score
+
+    def evaluate(self, board: Board) -> int:
+        """ Return the score of board from the point of view of the player to move."""
+        self.visit()
+        return evaluate(board, board.who, self.piece_scores)
+
+    def visit(self) -> None:
+        """ Count a searched node, and raise SearchAborted if the search
+        should stop."""
+        self.nodes += 1
+        if self.stop_requested or (self.deadline is not None
+                                   and time.time() > self.deadline):
+            raise SearchAborted
+
+
+def quiescence(board: Board, alpha: int, beta: int, evaluate,
+               ply: int = 0) -> int:
+    """ Return the score of board for the player to move, searching only
+    captures and promotions until the position is quiet.
+    evaluate(board) scores a position for the player to move. That score is
+    a lower bound on the score of the position (stand pat), since the player
+    to move is not forced to capture.
+    """
+    stand_pat = evaluate(board)
+    if stand_pat >= beta:
+        return stand_pat
+    moves = board.all_legal_moves
+    if not moves:
+        if board.check(board.who):
+            return -MATE_SCORE + ply
+        return 0
+    alpha = max(alpha, stand_pat)
+    for move in MoveOrderer.order_captures(board, moves):
+        board.push(move)
+        score = -quiescence(board, -beta, -alpha, evaluate, ply + 1)
+        board.pop()
+        if score >= beta:
+            return score
+        alpha = max(alpha, score)
+    return alpha
+
+
+def material_balance(board: Board, color: Color,
+                     piece_scores: dict = PIECE_SCORES) -> int:
+    """ Return the material of color minus the material of the other color,
+    valuing each piece by its letter in piece_scores. The piece counts are
+    kept up to date by the board, so this takes constant time."""
+    counts = board.piece_counts
+    own, opp = counts[color], counts[Color.other(color)]
+    return sum(score * (own[letter] - opp[letter])
+               for letter, score in piece_scores.items())
+
+
+def evaluate(board: Board, color: Color, piece_scores: dict = PIECE_SCORES) -> int:
+    """ Return the score of board for color in centipawns: the material
+    balance, plus the balance of the piece-square values that the board
+    keeps up to date."""
+    positional = board.positional
+    return 100 * material_balance(board, color, piece_scores) \
+        + positional[color.value] - positional[1 - color.value]
@@ -19,8 +19,15 @@ TODO:
 
 import argparse
 import time
+import numpy as np
 from chess import *
-from players import RandomPlayer, MiniMax
+from bitboard import BitBoard
+from players import RandomPlayer, MiniMax, AlphaBeta, quiescence, material_balance, evaluate, PIECE_SCORES
+from transposition import (TranspositionTable, SharedTranspositionTable,
+                           EXACT, LOWER_BOUND)
+from ordering import MoveOrderer
+from batch import BatchEvaluator, encode, encode_many
+import tournament
 
 
 def test(num_games):
@@ -550,6 +557,730 @@ def test(num_games):
     """
 
 
+def test_push_pop():
+    """
+    Test that Board.pop takes back moves made with Board.push.
+    >>> b = Board('r3k2r/1P4pp/8/3pP3/8/8/6PP/R3K2R w KQkq d6 4 30')
+    >>> fen_str = b.fen_str
+    >>> moves = [Move(Location('e5'), Location('d6')),
+    ...          Move(Location('e1'), Location('g1')),
+    ...          Move(Location('b7'), Location('b8'), promotion='n'),
+    ...          Move(Location('h1'), Location('f1')),
+    ...          Move(Location('g2'), Location('g4'))]
+    >>> for move in moves:
+    ...     b.push(move)
+    ...     print(b.fen_str)
+    ...     print(b.pop(), b.fen_str == fen_str)
+    r3k2r/1P4pp/3P4/8/8/8/6PP/R3K2R b KQkq - 0 30
+    e5d6 True
+    r3k2r/1P4pp/8/3pP3/8/8/6PP/R4RK1 b kq - 5 30
+    e1g1 True
+    rN2k2r/6pp/8/3pP3/8/8/6PP/R3K2R b KQkq - 0 30
+    b7b8=n True
+    r3k2r/1P4pp/8/3pP3/8/8/6PP/R3KR2 b Qkq - 5 30
+    h1f1 True
+    r3k2r/1P4pp/8/3pP3/6P1/8/7P/R3K2R b KQkq g3 0 30
+    g2g4 True
+    >>> print(b.get_piece_at(Location('a8')), b.get_piece_at(Location('b7')).location.algebraic)
+    ♜ b7
+    >>> b.push(moves[1]); b.push(Move(Location('e8'), Location('c8'))); b.fen_str
+    '2kr3r/1P4pp/8/3pP3/8/8/6PP/R4RK1 w - - 6 31'
+    >>> b.pop(), b.pop(), b.fen_str == fen_str
+    (e8c8, e1g1, True)
+    """
+
+
+def test_zobrist():
+    """
+    Test that the zobrist key identifies positions.
+    >>> b = Board()
+    >>> start = b.zobrist_key
+    >>> for move in ['g1f3', 'g8f6', 'f3g1', 'f6g8']:
+    ...     b.make_move(Move(Location(move[:2]), Location(move[2:])))
+    >>> b.zobrist_key == start, b.zobrist_key == b.compute_zobrist_key()
+    (True, True)
+    >>> b1, b2 = Board(), Board()
+    >>> for move in ['g1f3', 'e7e6', 'd2d3']:
+    ...     b1.make_move(Move(Location(move[:2]), Location(move[2:])))
+    >>> for move in ['d2d3', 'e7e6', 'g1f3']:
+    ...     b2.make_move(Move(Location(move[:2]), Location(move[2:])))
+    >>> b1.zobrist_key == b2.zobrist_key, b1.zobrist_key == Board(b1.fen_str).zobrist_key
+    (True, True)
+    >>> b = Board('r3k2r/1P4pp/8/3pP3/8/8/6PP/R3K2R w KQkq d6 4 30')
+    >>> b.push(Move(Location('e1'), Location('g1')))
+    >>> b.zobrist_key == Board(b.fen_str).zobrist_key == BitBoard(b.fen_str).zobrist_key
+    True
+    >>> b.who = Color.WHITE
+    >>> b.zobrist_key == b.compute_zobrist_key()
+    True
+    """
+
+
+def test_transposition_table():
+    """
+    Test the transposition table used by the search players.
+    >>> table = TranspositionTable(size_mb=1)
+    >>> table.size, table.size_mb <= 1
+    (55188, True)
+    >>> key = Board().zobrist_key
+    >>> table.probe(key) is None
+    True
+    >>> table.store(key, 2, 15, EXACT, Move(Location('e2'), Location('e4')))
+    >>> table.probe(key)
+    (2, 15, 1, e2e4)
+    >>> table.store(key + table.size, 1, -3, LOWER_BOUND)
+    >>> table.probe(key + table.size) is None, table.probe(key)
+    (True, (2, 15, 1, e2e4))
+    >>> table.new_search()
+    >>> table.store(key + table.size, 1, -3, LOWER_BOUND, Move(Location('a7'), Location('a8'), 'n'))
+    >>> table.probe(key + table.size), table.probe(key)
+    ((1, -3, 2, a7a8=n), None)
+    >>> b = Board('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    >>> player = MiniMax(1)
+    >>> player.move(b)
+    d2d5
+    >>> player.table.probe(b.zobrist_key)
+    (1, 390, 1, d2d5)
+    >>> b = Board()
+    >>> for move in ['g1f3', 'g8f6', 'f3g1']:
+    ...     b.push(Move(Location(move[:2]), Location(move[2:])))
+    >>> player = MiniMax(1)
+    >>> _ = player.move(b)
+    >>> player.repetition_draws > 0, player.table.probe(b.zobrist_key)
+    (True, None)
+    >>> player = AlphaBeta(max_depth=2, time_limit=None)
+    >>> _ = player.move(b)
+    >>> player.repetition_draws > 0, player.table.probe(b.zobrist_key)
+    (True, None)
+    """
+
+
+def test_alpha_beta():
+    """
+    Test the alpha-beta player.
+    >>> b = Board('7k/8/6K1/8/8/8/8/R7 w - - 0 1')
+    >>> player = AlphaBeta(max_depth=2, time_limit=None)
+    >>> player.move(b)
+    a1a8
+    >>> player.table.probe(b.zobrist_key)[1]
+    9999
+    >>> b = Board('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    >>> AlphaBeta(max_depth=3, time_limit=None).move(b)
+    d2d5
+    >>> b.fen_str
+    '4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1'
+    >>> player = AlphaBeta(max_depth=20, time_limit=0.5)
+    >>> player.move(b) in b.all_legal_moves, b.undo_stack
+    (True, [])
+    >>> player.stop()
+    >>> player.negamax(b, 3, -10001, 10001, 0)
+    Traceback (most recent call last):
+    ...
+    players.SearchAborted
+    """
+
+
+def test_quiescence():
+    """
+    Test that leaf positions are only scored once they are quiet.
+    >>> b = Board('4k3/8/2p5/3p4/8/8/3Q4/4K3 w - - 0 1')
+    >>> def evaluate(board):
+    ...     return material_balance(board, board.who)
+    >>> evaluate(b)
+    5
+    >>> b.push(Move(Location('d2'), Location('d5')))
+    >>> evaluate(b), quiescence(b, -10000, 10000, evaluate)
+    (-6, 1)
+    >>> b.pop()
+    d2d5
+    >>> player = MiniMax(0, quiescence=False)
+    >>> player.move(b)
+    d2d5
+    >>> player = MiniMax(0)
+    >>> player.move(b) != Move(Location('d2'), Location('d5'))
+    True
+    >>> b = Board('7k/8/6K1/8/8/8/8/R7 b - - 0 1')
+    >>> b.push(Move(Location('h8'), Location('g8')))
+    >>> b.push(Move(Location('a1'), Location('a8')))
+    >>> quiescence(b, -10000, 10000, evaluate)
+    -10000
+    """
+
+
+def test_move_ordering():
+    """
+    Test that moves are ordered hash move first, then captures by MVV-LVA,
+    then killer moves, then quiet moves by history score.
+    >>> b = Board('4k3/8/2rq4/1P3N2/8/8/8/R3K3 w - - 0 1')
+    >>> orderer = MoveOrderer()
+    >>> hash_move = Move(Location('a1'), Location('a2'))
+    >>> killer = Move(Location('a1'), Location('a7'))
+    >>> orderer.record_cutoff(Color.WHITE, killer, 2, 1)
+    >>> orderer.record_cutoff(Color.WHITE, Move(Location('f5'), Location('g3')), 3, 2)
+    >>> orderer.order(b, b.all_legal_moves, hash_move, 1)[:5]
+    [a1a2, f5d6, b5c6, a1a7, f5g3]
+    >>> orderer.order(b, b.all_legal_moves, None, 2)[:3]
+    [f5d6, b5c6, f5g3]
+    >>> orderer.new_search()
+    >>> orderer.order(b, b.all_legal_moves, None, 1)[2:4]
+    [f5g3, a1a7]
+    """
+
+
+def test_bitboard():
+    """
+    Test that BitBoard behaves like Board.
+    >>> b = BitBoard()
+    >>> b.fen_str
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+    >>> len(b.all_legal_moves)
+    20
+    >>> try:
+    ...     b.make_move(Move(Location(algebraic='b7'), Location(algebraic='b6')))
+    ... except IllegalMoveError as e:
+    ...     print(e)
+    It is white\'s turn and white does not control the selected piece. Please select a valid piece to move.
+    >>> try:
+    ...     b.make_move(Move(Location(algebraic='a2'), Location(algebraic='a5')))
+    ... except IllegalMoveError as e:
+    ...     print(e)
+    Move is not legal.
+    >>> b.make_move(Move(Location(algebraic='e2'), Location(algebraic='e4')))
+    >>> b.make_move(Move(Location(algebraic='d7'), Location(algebraic='d5')))
+    >>> b.make_move(Move(Location(algebraic='e4'), Location(algebraic='e5')))
+    >>> b.make_move(Move(Location(algebraic='f7'), Location(algebraic='f5')))
+    >>> b.en_passant_target.algebraic
+    'f6'
+    >>> b.make_move(Move(Location(algebraic='e5'), Location(algebraic='f6'))); print(b)
+       a b c d e f g h
+    8  ♜ ♞ ♝ ♛ ♚ ♝ ♞ ♜  8
+    7  ♟ ♟ ♟ _ ♟ _ ♟ ♟  7
+    6  _ _ _ _ _ ♙ _ _  6
+    5  _ _ _ ♟ _ _ _ _  5
+    4  _ _ _ _ _ _ _ _  4
+    3  _ _ _ _ _ _ _ _  3
+    2  ♙ ♙ ♙ ♙ _ ♙ ♙ ♙  2
+    1  ♖ ♘ ♗ ♕ ♔ ♗ ♘ ♖  1
+       a b c d e f g h
+    rnbqkbnr/ppp1p1pp/5P2/3p4/8/8/PPPP1PPP/RNBQKBNR b KQkq - 0 3
+    <BLANKLINE>
+    >>> b = BitBoard('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1')
+    >>> sorted(map(str, b.all_legal_moves)) == sorted(map(str, Board(b.fen_str).all_legal_moves))
+    True
+    >>> b = BitBoard('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+    >>> len(b.all_legal_moves)
+    48
+    >>> b.make_move(Move(Location(algebraic='e1'), Location(algebraic='c1'))); b.fen_str
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/2KR3R b kq - 1 1'
+    >>> b = BitBoard('7k/6Q1/6K1/8/8/8/8/8 b - - 0 1')
+    >>> b.check(Color.BLACK), b.checkmate(Color.BLACK), b.has_winner
+    (True, True, True)
+    >>> b = BitBoard('1nb5/r5P1/p1k5/1pPp4/1P1Rr3/B3P3/P5Bp/b3K3 w - - 1 47')
+    >>> try:
+    ...     b.make_move(Move(Location('g7'), Location('g8')))
+    ... except PawnNeedsPromotionError as exp:
+    ...     print(exp)
+    To move the pawn to g8, specify the type of piece to promote the pawn to. Select from [q, r, n, b]. The move given was g7g8
+    >>> b.make_move(Move(Location('g7'), Location('g8'), promotion='n')); b.fen_str
+    '1nb3N1/r7/p1k5/1pPp4/1P1Rr3/B3P3/P5Bp/b3K3 b - - 0 47'
+    """
+
+
+def test_perft():
+    """
+    >>> b = Board()
+    >>> [b.perft(depth) for depth in range(4)]
+    [1, 20, 400, 8902]
+    >>> b.perft(3, {})
+    8902
+    >>> b.fen_str
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+    >>> b = Board('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+    >>> b.perft(2)
+    2039
+    >>> divide = b.divide(2)
+    >>> len(divide), sum(divide.values()), divide['e1c1'], divide['e1g1']
+    (48, 2039, 43, 43)
+    >>> Board('r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1').perft(2)
+    264
+    >>> b = BitBoard('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1')
+    >>> b.perft(3), b.perft(3, {})
+    (2812, 2812)
+
+    Capturing a rook on its starting square removes the castling right.
+    >>> b = Board('r3k2r/1P6/8/8/8/8/8/4K3 w kq - 0 1')
+    >>> b.make_move(Move(Location('b7'), Location('a8'), promotion='q')); b.fen_str
+    'Q3k2r/8/8/8/8/8/8/4K3 b k - 0 1'
+
+    A king can not castle out of check, or with only the queen side right.
+    >>> b = Board('r3k2r/8/8/8/8/8/8/4R1K1 b kq - 0 1')
+    >>> sorted(str(move) for move in b.all_legal_moves if move.origin == Location('e8'))
+    ['e8d7', 'e8d8', 'e8f7', 'e8f8']
+    >>> b = Board('r3k3/8/8/8/8/8/8/6K1 b q - 0 1')
+    >>> 'e8c8' in map(str, b.all_legal_moves)
+    True
+    """
+
+
+def test_checkers():
+    """
+    >>> b = Board('4k3/8/8/8/1B6/8/4R3/4K3 b - - 0 1')
+    >>> b.check(Color.BLACK), b.check(Color.WHITE)
+    (True, False)
+    >>> sorted(piece.algebraic for piece in b.checkers(Color.BLACK))
+    ['e2']
+    >>> b = Board('4k3/8/3N4/8/1B6/8/4R3/4K3 b - - 0 1')
+    >>> sorted(piece.algebraic for piece in b.checkers(Color.BLACK))
+    ['d6', 'e2']
+    >>> sorted(piece.algebraic for piece in BitBoard(b.fen_str).checkers(Color.BLACK))
+    ['d6', 'e2']
+
+    Pieces only give check along open lines, and pawns only capture forwards.
+    >>> b = Board('4k3/4P3/3P4/8/4n3/8/4R3/4K3 b - - 0 1')
+    >>> b.checkers(Color.BLACK)
+    []
+    >>> b = Board('4k3/8/8/8/8/8/3p4/4K3 w - - 0 1')
+    >>> [str(piece) for piece in b.checkers(Color.WHITE)]
+    ['\u265f']
+    >>> [piece.algebraic for piece in b.attackers(Location('e2'), Color.WHITE)]
+    ['e1']
+    """
+
+
+def test_legal_moves():
+    """
+    A pinned piece may only move along the pin, and in check the other
+    pieces may only capture the checking piece or block it.
+    >>> b = Board('4k3/4r3/8/8/8/8/4R3/4K3 w - - 0 1')
+    >>> b.get_piece_at(Location('e2')).all_legal_moves
+    [e2e3, e2e4, e2e5, e2e6, e2e7]
+    >>> b = Board('4k3/8/8/8/1b6/8/3N1R2/4K3 w - - 0 1')
+    >>> b.all_legal_moves
+    [f2f3, f2f4, f2f5, f2f6, f2f7, f2f8, f2f1, f2e2, f2g2, f2h2, e1e2, e1f1, e1d1]
+    >>> evasions, pins = b.pins_and_checks(Color.WHITE)
+    >>> evasions, sorted(pins[Location('d2').index])
+    (None, [33, 42, 51])
+
+    In double check only the king may move.
+    >>> b = Board('4k3/8/8/8/1b6/8/5R2/r3K3 w - - 0 1')
+    >>> b.all_legal_moves
+    [e1e2]
+    >>> b.pins_and_checks(Color.WHITE)[0]
+    set()
+
+    An en passant capture may not uncover a check along the rank.
+    >>> b = Board('8/8/8/K2pP2r/8/8/8/7k w - d6 0 1')
+    >>> b.get_piece_at(Location('e5')).all_legal_moves
+    [e5e6]
+    >>> b = Board('8/8/8/3pP3/8/8/8/K6k w - d6 0 1')
+    >>> b.get_piece_at(Location('e5')).all_legal_moves
+    [e5e6, e5d6]
+    """
+
+
+def test_legal_move_cache():
+    """
+    >>> b = Board()
+    >>> moves = b.legal_moves_by_piece(Color.WHITE)
+    >>> moves[6, 4]
+    [e2e3, e2e4]
+    >>> b.push(Move(Location('g1'), Location('f3')))
+    >>> b.push(Move(Location('g8'), Location('f6')))
+    >>> b.push(Move(Location('f3'), Location('g1')))
+    >>> b.push(Move(Location('f6'), Location('g8')))
+    >>> b.legal_moves_by_piece(Color.WHITE) is moves
+    True
+    >>> b.get_piece_at(Location('e2')).all_legal_moves
+    [e2e3, e2e4]
+    >>> b.legal_move_cache_size = 2
+    >>> b.perft(2)
+    400
+    >>> len(b.legal_move_cache)
+    2
+    """
+
+
+def test_piece_lists():
+    """
+    >>> def squares(board, color):
+    ...     return ' '.join(piece.algebraic + str(piece) for piece in board.color_pieces_flat(color))
+    >>> b = Board('r3k3/1P6/8/3pP3/8/8/8/4K2R w Kq d6 0 1')
+    >>> squares(b, Color.WHITE), squares(b, Color.BLACK)
+    ('b7\u2659 e5\u2659 e1\u2654 h1\u2656', 'a8\u265c e8\u265a d5\u265f')
+    >>> b.push(Move(Location('b7'), Location('a8'), promotion='q'))
+    >>> b.push(Move(Location('e8'), Location('d7')))
+    >>> b.push(Move(Location('e1'), Location('g1')))
+    >>> squares(b, Color.WHITE), squares(b, Color.BLACK)
+    ('a8\u2655 e5\u2659 f1\u2656 g1\u2654', 'd7\u265a d5\u265f')
+    >>> b.player_king(Color.WHITE).algebraic, b.player_king(Color.BLACK).algebraic
+    ('g1', 'd7')
+    >>> b.pop(), b.pop(), b.pop()
+    (e1g1, e8d7, b7a8=q)
+    >>> b.push(Move(Location('e5'), Location('d6')))
+    >>> squares(b, Color.WHITE), squares(b, Color.BLACK)
+    ('b7\u2659 d6\u2659 e1\u2654 h1\u2656', 'a8\u265c e8\u265a')
+    >>> b.pop()
+    e5d6
+    >>> squares(b, Color.WHITE), squares(b, Color.BLACK)
+    ('b7\u2659 e5\u2659 e1\u2654 h1\u2656', 'a8\u265c e8\u265a d5\u265f')
+
+    The occupancy maps are kept up to date in the same way.
+    >>> b.push(Move(Location('e5'), Location('d6')))
+    >>> b.occupancy[Color.BLACK][3], b.occupancy[Color.WHITE][2]
+    ([0, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 1, 0, 0, 0, 0])
+    >>> b.push(Move(Location('e8'), Location('d7')))
+    >>> b.push(Move(Location('e1'), Location('g1')))
+    >>> b.occupancy[Color.WHITE][7]
+    [0, 0, 0, 0, 0, 1, 1, 0]
+    >>> all(b.occupancy[color] == b.color_pieces(color) for color in Color)
+    True
+    >>> b.pop(), b.pop(), b.pop()
+    (e1g1, e8d7, e5d6)
+    >>> all(b.occupancy[color] == Board(b.fen_str).occupancy[color] for color in Color)
+    True
+    """
+
+
+def test_squares_and_moves():
+    """
+    >>> Location('e4') is Location(row_col=(4, 4)) is SQUARES[36]
+    True
+    >>> Location('e4').index, Location('-').index, Location(row_col=(8, 0)).in_bounds
+    (36, 64, False)
+    >>> import pickle
+    >>> pickle.loads(pickle.dumps(Location('e4'))) is Location('e4')
+    True
+
+    Moves compare and hash by origin, target and promotion.
+    >>> b = Board('4k3/1P6/8/3pP3/8/8/8/R3K3 w Q d6 0 1')
+    >>> moves = set(b.all_legal_moves)
+    >>> move = Move(Location('e5'), Location('d6'))
+    >>> move in moves, Move(Location('e1'), Location('c1')) in moves
+    (True, True)
+    >>> Move(Location('b7'), Location('b8'), 'n') in moves, Move(Location('b7'), Location('b8')) in moves
+    (True, False)
+    >>> Move.from_code(move.code) == move, Move(Location('a1'), Location('a2')) == None
+    (True, False)
+    >>> Move(Location('b7'), Location('b8'), 'k')
+    Traceback (most recent call last):
+    ...
+    chess.IllegalMoveError: Unknown promotion: k
+    """
+
+
+def test_slots():
+    """
+    >>> b = Board()
+    >>> objects = [b, BitBoard(), b.player_king(Color.WHITE), Location('e4'), b.all_legal_moves[0]]
+    >>> [hasattr(obj, '__dict__') for obj in objects]
+    [False, False, False, False, False]
+    >>> pawn = b.get_piece_at(Location('e7'))
+    >>> str(pawn), pawn.starting_row, pawn.forward, pawn.last_row
+    ('\u265f', 1, 1, 7)
+    """
+
+
+def test_evaluation():
+    """
+    >>> b = Board()
+    >>> b.piece_counts[Color.WHITE]
+    {'r': 2, 'n': 2, 'b': 2, 'q': 1, 'k': 1, 'p': 8}
+    >>> b.positional, evaluate(b, Color.WHITE)
+    ([-95, -95], 0)
+    >>> b.push(Move(Location('e2'), Location('e4')))
+    >>> b.positional, evaluate(b, Color.WHITE), evaluate(b, Color.BLACK)
+    ([-55, -95], 40, -40)
+    >>> b = Board('4k3/1P6/8/8/8/8/8/3qK3 w - - 0 1')
+    >>> material_balance(b, Color.WHITE), material_balance(b, Color.WHITE, {'p': 1, 'q': 9})
+    (-6, -8)
+    >>> b.push(Move(Location('e1'), Location('d1')))
+    >>> b.push(Move(Location('e8'), Location('d7')))
+    >>> b.push(Move(Location('b7'), Location('b8'), 'q'))
+    >>> b.piece_counts[Color.WHITE]['q'], b.piece_counts[Color.WHITE]['p'], b.piece_counts[Color.BLACK]['q']
+    (1, 0, 0)
+    >>> evaluate(b, Color.WHITE) == evaluate(Board(b.fen_str), Color.WHITE) == evaluate(BitBoard(b.fen_str), Color.WHITE)
+    True
+    >>> b.pop(), b.pop(), b.pop()
+    (b7b8=q, e8d7, e1d1)
+    >>> b.piece_counts[Color.BLACK]['q'], material_balance(b, Color.WHITE)
+    (1, -6)
+    """
+
+
+def test_batch_evaluation():
+    """
+    >>> b = Board('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    >>> planes = encode(b)
+    >>> planes.shape, int(planes.sum()), int(planes[3, Location('d2').index]), int(planes[10, Location('d5').index])
+    ((12, 64), 4, 1, 1)
+    >>> bool((encode(BitBoard(b.fen_str)) == planes).all())
+    True
+    >>> boards = [b, Board(), Board('4k3/8/8/3R4/8/8/8/4K3 b - - 0 1')]
+    >>> stacked = encode_many(boards)
+    >>> stacked.shape
+    (3, 12, 64)
+    >>> evaluator = BatchEvaluator(PIECE_SCORES)
+    >>> evaluator.evaluate(stacked).tolist() == [evaluate(board, Color.WHITE) for board in boards]
+    True
+    >>> evaluator.evaluate(stacked, Color.BLACK).tolist()
+    [305, 0, -400]
+    >>> player = MiniMax(0, hash_mb=0, batch_evaluator=evaluator)
+    >>> player.move(b), player.counter
+    (d2d5, 0)
+    """
+
+
+def test_status():
+    """
+    >>> Board().status(), BitBoard().status()
+    (<Status.ONGOING: 0>, <Status.ONGOING: 0>)
+    >>> b = Board('R6k/8/6K1/8/8/8/8/8 b - - 1 1')
+    >>> b.status(), b.has_winner, b.has_legal_move(Color.BLACK), BitBoard(b.fen_str).status()
+    (<Status.CHECKMATE: 1>, True, False, <Status.CHECKMATE: 1>)
+    >>> b.status_cache[b.zobrist_key]
+    <Status.CHECKMATE: 1>
+    >>> b = Board('7k/8/6QK/8/8/8/8/8 b - - 0 1')
+    >>> b.status(), b.has_winner, BitBoard(b.fen_str).status()
+    (<Status.STALEMATE: 2>, False, <Status.STALEMATE: 2>)
+    >>> Board('7k/8/6K1/8/8/8/8/R7 b - - 100 80').status()
+    <Status.FIFTY_MOVES: 3>
+    >>> Board('R6k/8/6K1/8/8/8/8/8 b - - 100 80').status()
+    <Status.CHECKMATE: 1>
+    >>> for board in (Board(), BitBoard()):
+    ...     statuses = []
+    ...     for move in ['g1f3', 'g8f6', 'f3g1', 'f6g8'] * 2:
+    ...         board.push(Move(Location(move[:2]), Location(move[2:])))
+    ...         statuses.append(board.status().name[0])
+    ...     print(''.join(statuses), board.repetitions())
+    OOOOOOOR 3
+    OOOOOOOR 3
+    """
+
+
+def test_trusted_make_move():
+    """
+    >>> b = Board()
+    >>> e4 = Move(Location('e2'), Location('e4'))
+    >>> e4 in b.legal_move_set(), Move(Location('e2'), Location('e5')) in b.legal_move_set()
+    (True, False)
+    >>> b.legal_move_set_cache[0] == b.zobrist_key, len(b.legal_move_set_cache[1])
+    (True, 20)
+    >>> b.make_move(e4)
+    >>> b.make_move(Move(Location('e7'), Location('e5')), trusted=True)
+    >>> b.make_move(Move(Location('e4'), Location('e5')))
+    Traceback (most recent call last):
+    ...
+    chess.IllegalMoveError: Move is not legal.
+    >>> b.make_move(Move(Location('d2'), Location('d3'), 'q'))
+    Traceback (most recent call last):
+    ...
+    chess.IllegalMoveError: Promotion is not valid for this move.
+    >>> b.make_move(Move(Location('e4'), Location('e5')), trusted=True)  # not checked
+    >>> b.fen_str
+    'rnbqkbnr/pppp1ppp/8/4P3/8/8/PPPP1PPP/RNBQKBNR b KQkq - 0 2'
+    >>> bb = BitBoard()
+    >>> bb.make_move(e4, trusted=True); bb.fen_str
+    'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'
+    """
+
+
+def test_copy():
+    """
+    >>> for board in (Board(), BitBoard()):
+    ...     for move in ['e2e4', 'd7d5', 'e4d5']:
+    ...         board.push(Move(Location(move[:2]), Location(move[2:])))
+    ...     copy = board.copy()
+    ...     copy.push(Move(Location('d8'), Location('d5')))
+    ...     print(copy.pop(), board.fen_str == copy.fen_str, len(copy.undo_stack))
+    ...     while copy.undo_stack:
+    ...         _ = copy.pop()
+    ...     print(copy.fen_str == Board.initial_setup, board.fen_str)
+    d8d5 True 3
+    True rnbqkbnr/ppp1pppp/8/3P4/8/8/PPPP1PPP/RNBQKBNR b KQkq - 0 2
+    d8d5 True 3
+    True rnbqkbnr/ppp1pppp/8/3P4/8/8/PPPP1PPP/RNBQKBNR b KQkq - 0 2
+    >>> b = Board('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+    >>> copy = b.copy()
+    >>> all(piece.board is copy for piece in copy.pieces[Color.WHITE] | copy.pieces[Color.BLACK])
+    True
+    >>> copy.push(Move(Location('e1'), Location('g1')))
+    >>> copy.fen_str, b.fen_str
+    ('r3k2r/8/8/8/8/8/8/R4RK1 b kq - 1 1', 'r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1')
+    >>> copy.occupancy[Color.WHITE][7], b.occupancy[Color.WHITE][7]
+    ([1, 0, 0, 0, 0, 1, 1, 0], [1, 0, 0, 0, 1, 0, 0, 1])
+    """
+
+
+def test_fen_cache():
+    """
+    >>> b = Board()
+    >>> b.fen_str is b.fen_str, b.rank_fens
+    (True, ['rnbqkbnr', 'pppppppp', '8', '8', '8', '8', 'PPPPPPPP', 'RNBQKBNR'])
+    >>> b.push(Move(Location('e2'), Location('e4')))
+    >>> b.rank_fens
+    ['rnbqkbnr', 'pppppppp', '8', '8', None, '8', None, 'RNBQKBNR']
+    >>> b.fen_str
+    'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'
+    >>> _ = b.pop(); b.fen_str
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+    >>> [piece.fen_letter for piece in b.board_rep[0]] + [b.get_piece_at(Location('e1')).fen_letter]
+    ['r', 'n', 'b', 'q', 'k', 'b', 'n', 'r', 'K']
+    """
+
+
+def test_repetition():
+    """
+    >>> b = Board()
+    >>> shuffle = [Move(Location(move[:2]), Location(move[2:]))
+    ...            for move in ['g1f3', 'g8f6', 'f3g1', 'f6g8']]
+    >>> for move in shuffle:
+    ...     b.push(move)
+    >>> len(b.position_keys), b.position_keys[0] == b.zobrist_key, b.repetitions()
+    (5, True, 2)
+    >>> b.push(Move(Location('e2'), Location('e4')))
+    >>> b.half_move_clock, b.repetitions()
+    (0, 1)
+    >>> _ = b.pop(); _ = b.pop()
+    >>> len(b.position_keys), b.repetitions(), b.copy().repetitions()
+    (4, 1, 1)
+    >>> b.push(shuffle[-1])
+    >>> MiniMax(2).child_score(b, 1), AlphaBeta().negamax(b, 2, -10001, 10001, 1)
+    (0, 0)
+    >>> bb = BitBoard()
+    >>> for move in shuffle * 2:
+    ...     bb.push(move)
+    >>> bb.repetitions(), bb.status()
+    (3, <Status.REPETITION: 4>)
+    """
+
+
+def test_parallel_search():
+    """
+    >>> b = Board('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    >>> serial = MiniMax(2, hash_mb=0)
+    >>> parallel = MiniMax(2, hash_mb=0, workers=2)
+    >>> serial.color = parallel.color = Color.WHITE
+    >>> move, score = serial.move_helper(b)
+    >>> parallel.parallel_move_helper(b) == (move, score), move
+    (True, d2d5)
+    >>> parallel.counter == serial.counter
+    True
+    >>> parallel.move(b), b.fen_str == '4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1'
+    (d2d5, True)
+    >>> parallel.close()
+    >>> parallel.executor is None
+    True
+    >>> fen = 'r1bqkbnr/pppp1ppp/2n5/4p3/3PP3/5N2/PPP2PPP/RNBQKB1R b KQkq d3 0 3'
+    >>> centre = {letter: [0] * 64 for letter in 'kqrbnp'}
+    >>> centre['n'] = [10 * (2 <= i % 8 <= 5 and 2 <= i // 8 <= 5) for i in range(64)]
+    >>> evaluator = BatchEvaluator(PIECE_SCORES, centre)
+    >>> for board in (Board(fen, centre), BitBoard(fen, centre)):
+    ...     serial = MiniMax(1, hash_mb=0, batch_evaluator=evaluator)
+    ...     parallel = MiniMax(1, hash_mb=0, batch_evaluator=evaluator, workers=2)
+    ...     serial.color = parallel.color = Color.BLACK
+    ...     np.random.seed(0)
+    ...     expected = serial.move_helper(board)
+    ...     np.random.seed(0)
+    ...     print(parallel.parallel_move_helper(board) == expected, expected[1])
+    ...     parallel.close()
+    True 0
+    True 0
+    """
+
+
+def test_shared_transposition_table():
+    """
+    >>> import pickle
+    >>> table = SharedTranspositionTable(size_mb=1)
+    >>> table.size
+    65536
+    >>> key = Board().zobrist_key
+    >>> table.store(key, 2, -15, EXACT, Move(Location('a7'), Location('a8'), 'n'))
+    >>> other = pickle.loads(pickle.dumps(table))
+    >>> other.name == table.name, other.probe(key)
+    (True, (2, -15, 1, a7a8=n))
+    >>> other.store(key + table.size, 1, 3, LOWER_BOUND)
+    >>> table.probe(key + table.size), table.probe(key)
+    (None, (2, -15, 1, a7a8=n))
+    >>> other.new_search()
+    >>> table.age
+    1
+    >>> table.store(key + table.size, 1, 3, LOWER_BOUND)
+    >>> other.probe(key + table.size), other.probe(key)
+    ((1, 3, 2, None), None)
+    >>> table.entries[key % table.size, 1] ^= 1  # a torn write
+    >>> table.probe(key + table.size) is None
+    True
+    >>> other.close()
+    >>> table.close()
+    >>> table.unlink()
+    >>> b = Board('4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1')
+    >>> table = SharedTranspositionTable(size_mb=1)
+    >>> name = table.name
+    >>> del table
+    >>> try:
+    ...     SharedTranspositionTable(name=name)
+    ... except FileNotFoundError:
+    ...     print('freed')
+    freed
+    >>> player = MiniMax(2, hash_mb=1, workers=2)
+    >>> player.table is None
+    True
+    >>> player.move(b)
+    d2d5
+    >>> player.table.probe(b.zobrist_key)[::2]
+    (2, 1)
+    >>> b.push(Move(Location('d2'), Location('d5')))
+    >>> player.table.probe(b.zobrist_key)[0]  # stored by a worker
+    1
+    >>> player.close()
+    """
+
+
+def test_tournament():
+    """
+    >>> import json, os, tempfile
+    >>> mate = '7k/8/6K1/8/8/8/8/R7 w - - 0 1'
+    >>> tournament.schedule('m:1', 'r', [mate, Board.initial_setup], 3)[1:]
+    [(1, 'r', 'm:1', '7k/8/6K1/8/8/8/8/R7 w - - 0 1'), (2, 'm:1', 'r', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')]
+    >>> tournament.make_player('a:3,None').max_depth, tournament.make_player('m').depth
+    (3, 0)
+    >>> tournament.make_player('x')
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown player 'x', choose from ['a', 'h', 'm', 'r']
+    >>> tournament.elo(60, 20, 20), tournament.elo(10, 0, 10), tournament.elo(5, 0, 0)
+    ((147.19, 66.01), (0.0, 163.32), (inf, nan))
+    >>> out = os.path.join(tempfile.mkdtemp(), 'games.jsonl')
+    >>> summary = tournament.run('m:1', 'r', [mate], 1, 1, out)
+    >>> summary['wins'], summary['draws'], summary['losses'], summary['a']['nps'] > 0
+    (1, 0, 0, True)
+    >>> with open(out) as f:
+    ...     record = json.loads(f.read())
+    >>> record['result'], record['plies'], record['final'], record['white_stats']['moves']
+    ('w', 1, 'R6k/8/6K1/8/8/8/8/8 b - - 1 1', 1)
+    >>> import contextlib, io
+    >>> with contextlib.redirect_stderr(io.StringIO()) as err:
+    ...     tournament.main(['m:1', 'r', '--games', '0'])
+    Traceback (most recent call last):
+    ...
+    SystemExit: 2
+    >>> empty = os.path.join(tempfile.mkdtemp(), 'openings.txt')
+    >>> with open(empty, 'w') as f:
+    ...     _ = f.write('# no openings')
+    >>> with contextlib.redirect_stderr(err):
+    ...     tournament.main(['m:1', 'r', '--openings', empty])
+    Traceback (most recent call last):
+    ...
+    SystemExit: 2
+    >>> err.getvalue().splitlines()[-1].endswith('error: no fen strings in ' + empty)
+    True
+    >>> records = [dict(record, game=1, white='r', black='m:1', result='b')]
+    >>> tournament.summarize(records + [record])['losses']
+    0
+    """
+
+
 def run_games(num_games: int):
     """ Play games with random players to ensure things are running smoothly.
     """
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+""" Play a tournament between two players across a pool of processes.
+
+Players are given by their letter in cli.players, optionally followed by a
+colon and the arguments to construct them with, e.g. `m:1` for MiniMax(1)
+or `a:3,None` for AlphaBeta(3, None). Run
+`python3 tournament.py m:1 m --games 100 --workers 4 --out results.jsonl`
+to play 100 games, each opening played once with each color. Every game is
+appended to the output file as a line of json as soon as it finishes, and
+the wins, draws and losses of the first player, its Elo difference and the
+move times and search speed of both players are reported at the end.
+"""
+
+import argparse
+import ast
+import json
+import math
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Tuple
+
+from chess import Board, Color, play
+from cli import players
+
+
+class TimedPlayer:
+    """ Wrap a player, recording the time it spends on its moves and the
+    nodes it searches, read from its nodes attribute after each move."""
+    def __init__(self, player):
+        self.player = player
+        self.trusted = getattr(player, 'trusted', False)
+        self.moves = 0
+        self.seconds = 0.0
+        self.nodes = 0
+
+    def move(self, board):
+        start = time.perf_counter()
+        move = self.player.move(board)
+        self.seconds += time.perf_counter() - start
+        self.moves += 1
+        self.nodes += getattr(self.player, 'nodes', 0)
+        return move
+
+    def stats(self) -> dict:
+        return {'moves': self.moves, 'seconds': self.seconds, 'nodes': self.nodes}
+
+
+def make_player(spec: str):
+    """ Return a new player built from a spec like 'm:1'."""
+    letter, _, args = spec.partition(':')
+    if letter not in players:
+        raise ValueError(f'Unknown player {letter!r}, choose from {sorted(players)}')
+    args = ast.literal_eval(f'({args},)') if args else ()
+    return players[letter](*args)
+
+
+def play_game(game: int, white: str, black: str, fen: str) -> dict:
+    """ Play one game from fen and return its record."""
+    timed = {'white': TimedPlayer(make_player(white)),
+             'black': TimedPlayer(make_player(black))}
+    board = Board(fen)
+    # play moves p_0 first, whichever color it is
+    order = ('white', 'black') if board.who is Color.WHITE else ('black', 'white')
+    try:
+        winner = play(*(timed[color] for color in order), print_visuals=False,
+                      board=board)
+    finally:
+        for player in timed.values():
+            if hasattr(player.player, 'close'):
+                player.player.close()
+    return {'game': game, 'white': white, 'black': black, 'opening': fen,
+            'result': winner, 'plies': len(board.undo_stack),
+            'final': board.fen_str,
+            'white_stats': timed['white'].stats(),
+            'black_stats': timed['black'].stats()}
+
+
+def read_openings(path: str) -> List[str]:
+    """ Return the fen strings in the file at path, one per line. Blank
+    lines and lines starting with # are skipped."""
+    with open(path) as f:
+        return [line.strip() for line in f
+                if line.strip() and not line.startswith('#')]
+
+
+def schedule(player_a: str, player_b: str, openings: List[str],
+             games: int) -> List[Tuple[int, str, str, str]]:
+    """ Return the (game, white, black, fen) of each game. The openings are
+    cycled through, each one played twice in a row with the colors
+    swapped."""
+    pairings = []
+    for game in range(games):
+        fen = openings[game // 2 % len(openings)]
+        if game % 2 == 0:
+            pairings.append((game, player_a, player_b, fen))
+        else:
+            pairings.append((game, player_b, player_a, fen))
+    return pairings
+
+
+def elo(wins: int, draws: int, losses: int) -> Tuple[float, float]:
+    """ Return the Elo difference given by a score, and the half width of
+    its 95% confidence interval."""
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    if score in (0, 1):
+        return math.copysign(math.inf, score - 0.5), math.nan
+    deviation = math.sqrt((wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2
+                           + losses * score ** 2) / games / games)
+
+    def to_elo(p):
+        p = min(max(p, 1e-9), 1 - 1e-9)
+        return -400 * math.log10(1 / p - 1)
+
+    error = (to_elo(score + 1.96 * deviation)
+             - to_elo(score - 1.96 * deviation)) / 2
+    return round(to_elo(score), 2) + 0.0, round(error, 2)
+
+
+def summarize(records: List[dict]) -> dict:
+    """ Return the wins, draws and losses of the first player in records,
+    who plays white in the even numbered games, its Elo difference and the
+    average move time and nodes per second of each player."""
+    summary = {'wins': 0, 'draws': 0, 'losses': 0}
+    totals = {'a': [0, 0.0, 0], 'b': [0, 0.0, 0]}
+    for record in records:
+        first = 'white' if record['game'] % 2 == 0 else 'black'
+        for color in ('white', 'black'):
+            stats = record[color + '_stats']
+            total = totals['a' if color == first else 'b']
+            total[0] += stats['moves']
+            total[1] += stats['seconds']
+            total[2] += stats['nodes']
+        if record['result'] == '-':
+            summary['draws'] += 1
+        elif record['result'] == first[0]:
+            summary['wins'] += 1
+        else:
+            summary['losses'] += 1
+    summary['elo'], summary['error'] = elo(summary['wins'], summary['draws'],
+                                           summary['losses'])
+    for name, (moves, seconds, nodes) in totals.items():
+        summary[name] = {'move_time': seconds / max(1, moves),
+                         'nps': nodes / seconds if seconds else 0.0}
+    return summary
+
+
+def run(player_a: str, player_b: str, openings: List[str], games: int,
+        workers: int, out: str, progress=None) -> dict:
+    """ Play the games across workers processes, appending each record to
+    the file out as it finishes, and return the summary. If progress is
+    given, it is called with each record as it finishes."""
+    records = []
+    with ProcessPoolExecutor(workers) as executor, open(out, 'a') as f:
+        futures = [executor.submit(play_game, *pairing)
+                   for pairing in schedule(player_a, player_b, openings, games)]
+        for future in as_completed(futures):
+            record = future.result()
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            records.append(record)
+            if progress is not None:
+                progress(record)
+    return summarize(records)
+
+
+def print_progress(record: dict) -> None:
+    """ Print a line about a finished game to stderr."""
+    print('game {game}: {white} - {black} {result} ({plies} plies)'
+          .format(**record), file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    """ Parse the command line, run the tournament and print the summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0].strip())
+    parser.add_argument('player_a', help="the first player, e.g. 'm:1'")
+    parser.add_argument('player_b', help="the second player, e.g. 'r'")
+    parser.add_argument('--games', type=int, default=2,
+                        help='the number of games to play')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='the number of processes, one per cpu by default')
+    parser.add_argument('--openings',
+                        help='a file of fen strings to start the games from, '
+                             'the initial setup by default')
+    parser.add_argument('--out', default='tournament.jsonl',
+                        help='the file to append the game records to')
+    args = parser.parse_args(argv)
+    if args.games < 1:
+        parser.error('--games must be at least 1')
+
+    openings = read_openings(args.openings) if args.openings else [Board.initial_setup]
+    if not openings:
+        parser.error(f'no fen strings in {args.openings}')
+    for spec in (args.player_a, args.player_b):
+        player = make_player(spec)  # fail early on a bad spec
+        if hasattr(player, 'close'):
+            player.close()
+    summary = run(args.player_a, args.player_b, openings, args.games,
+                  args.workers, args.out, print_progress)
+    print('{} vs {}: +{wins} ={draws} -{losses}'.format(
+        args.player_a, args.player_b, **summary))
+    print('Elo difference: {elo} +/- {error}'.format(**summary))
+    for name, spec in (('a', args.player_a), ('b', args.player_b)):
+        print('{}: {:.3f}s per move, {:.0f} nodes/s'.format(
+            spec, summary[name]['move_time'], summary[name]['nps']))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+""" A transposition table for the search players.
+
+The table is a fixed size array of packed entries, so its memory use is
+decided when it is created and does not grow while a game is played.
+SharedTranspositionTable keeps its entries in shared memory instead, so
+the worker processes of a parallel search can all probe and store into one
+table.
+"""
+
+import weakref
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+from chess import Move
+
+EMPTY, EXACT, LOWER_BOUND, UPPER_BOUND = range(4)
+
+ENTRY = np.dtype([
+    ('key', np.uint64),
+    ('score', np.int32),
+    ('move', np.int32),
+    ('depth', np.int8),
+    ('bound', np.uint8),
+    ('age', np.uint8),
+])
+
+NO_MOVE = 0
+
+
+def encode_move(move: Move) -> int:
+    """ Return move packed into an integer, or NO_MOVE if move is None."""
+    if move is None:
+        return NO_MOVE
+    return 1 + move.code
+
+
+def decode_move(code: int) -> Optional[Move]:
+    """ Return the move packed into code by encode_move."""
+    if code == NO_MOVE:
+        return None
+    return Move.from_code(code - 1)
+
+
+class TranspositionTable:
+    """ A fixed size hash table of search results, keyed by zobrist key.
+
+    Each entry stores the key, the depth searched, the score, the bound type
+    of the score and the best move found. When two positions map to the same
+    slot, the new result replaces the old one if the old one was stored
+    during an earlier search or was searched to no greater depth.
+    """
+    def __init__(self, size_mb: float = 16):
+        self.size = max(1, int(size_mb * 2**20) // ENTRY.itemsize)
+        self.entries = np.zeros(self.size, dtype=ENTRY)
+        self.age = 0
+        self.hits = 0
+
+    @property
+    def size_mb(self) -> float:
+        """ The memory used by the entries, in megabytes."""
+        return self.entries.nbytes / 2**20
+
+    def new_search(self) -> None:
+        """ Mark the entries stored so far as belonging to an older search."""
+        self.age = (self.age + 1) % 256
+
+    def clear(self) -> None:
+        """ Remove every entry."""
+        self.entries.fill(0)
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, Optional[Move]]]:
+        """ Return the (depth, score, bound, move) stored for key, or None."""
+        stored_key, score, move, depth, bound, _ = self.entries[key % self.size].item()
+        if bound == EMPTY or stored_key != key:
+            return None
+        self.hits += 1
+        return depth, score, bound, decode_move(move)
+
+    def store(self, key: int, depth: int, score: int, bound: int,
+              move: Move = None) -> None:
+        """ Store a search result for key, subject to the replacement policy."""
+        index = key % self.size
+        stored_key, _, _, stored_depth, stored_bound, stored_age = \
+            self.entries[index].item()
+        if stored_bound == EMPTY or stored_key == key \
+                or stored_age != self.age or depth >= stored_depth:
+            self.entries[index] = (key, score, encode_move(move), depth, bound,
+                                   self.age)
+
+
+# a shared entry is two 64 bit words, the key xor the data, then the data:
+# score (32 bits, offset by 2**31), move (18), depth (8), bound (2), age (4)
+SCORE_OFFSET = 2**31
+MOVE_SHIFT, DEPTH_SHIFT, BOUND_SHIFT, AGE_SHIFT = 32, 50, 58, 60
+AGES = 16
+# the first entry holds the age of the current search instead of a result
+HEADER = 1
+
+
+def pack_entry(score: int, move: int, depth: int, bound: int, age: int) -> int:
+    """ Return the fields of a shared entry packed into 64 bits."""
+    return ((score + SCORE_OFFSET) | move << MOVE_SHIFT
+            | (depth & 0xff) << DEPTH_SHIFT | bound << BOUND_SHIFT
+            | age << AGE_SHIFT)
+
+
+def unpack_entry(data: int) -> Tuple[int, int, int, int, int]:
+    """ Return the (score, move, depth, bound, age) packed into data."""
+    depth = data >> DEPTH_SHIFT & 0xff
+    return ((data & 0xffffffff) - SCORE_OFFSET,
+            data >> MOVE_SHIFT & 0x3ffff,
+            depth - 256 if depth >= 128 else depth,
+            data >> BOUND_SHIFT & 0x3,
+            data >> AGE_SHIFT)
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """ A transposition table in shared memory, for the worker processes of
+    a parallel search.
+
+    The table is created by passing a size, and opened in another process
+    by passing the name of an existing table; it is also opened again by
+    name when it is pickled. Entries are read and written without locks:
+    each one is stored as the key xor the data alongside the data, so an
+    entry torn by two processes writing it at once no longer matches its
+    key and is read as empty. The age of the current search is kept in the
+    table, so new_search only needs to be called by one process, and only
+    16 ages are told apart. The shared memory is freed by unlink, or when
+    the table that created it is garbage collected or the process exits.
+    """
+    def __init__(self, size_mb: float = 16, name: str = None):
+        if name is None:
+            size = max(1, int(size_mb * 2**20) // 16) + HEADER
+            self.memory = shared_memory.SharedMemory(create=True, size=size * 16)
+            self.finalizer = weakref.finalize(self, self.memory.unlink)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.finalizer = None
+        self.size = self.memory.size // 16 - HEADER
+        self.words = np.ndarray((self.size + HEADER, 2), dtype=np.uint64,
+                                buffer=self.memory.buf)
+        self.entries = self.words[HEADER:]
+        if name is None:
+            self.words.fill(0)
+        self.hits = 0
+
+    def __reduce__(self):
+        return (SharedTranspositionTable, (0, self.name))
+
+    @property
+    def name(self) -> str:
+        """ The name to open the table by in another process."""
+        return self.memory.name
+
+    @property
+    def age(self) -> int:
+        return int(self.words[0, 0])
+
+    @age.setter
+    def age(self, age: int) -> None:
+        self.words[0, 0] = age % AGES
+
+    def clear(self) -> None:
+        """ Remove every entry."""
+        self.entries.fill(0)
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, Optional[Move]]]:
+        """ Return the (depth, score, bound, move) stored for key, or None."""
+        check, data = self.entries[key % self.size].tolist()
+        if check ^ data != key:
+            return None
+        score, move, depth, bound, _ = unpack_entry(data)
+        if bound == EMPTY:
+            return None
+        self.hits += 1
+        return depth, score, bound, decode_move(move)
+
+    def store(self, key: int, depth: int, score: int, bound: int,
+              move: Move = None) -> None:
+        """ Store a search result for key, subject to the replacement policy."""
+        index = key % self.size
+        check, data = self.entries[index].tolist()
+        _, _, stored_depth, stored_bound, stored_age = unpack_entry(data)
+        age = self.age
+        if check ^ data != key and stored_bound != EMPTY \
+                and stored_age == age and depth < stored_depth:
+            return
+        data = pack_entry(score, encode_move(move), depth, bound, age)
+        self.entries[index] = (key ^ data, data)
+
+    def close(self) -> None:
+        """ Stop using the table in this process."""
+        self.entries = self.words = None
+        self.memory.close()
+
+    def unlink(self) -> None:
+        """ Free the shared memory once every process has closed the table."""
+        if self.finalizer is not None:
+            self.finalizer()
+        else:
+            self.memory.unlink()